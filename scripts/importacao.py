@@ -0,0 +1,71 @@
+import subprocess
+import sys
+from argparse import ArgumentParser, Namespace
+from statistics import median
+from time import perf_counter
+
+# Módulos que não dependem da interface e não podem carregar o textual nem o numpy
+MODULOS = ('mcts.jogo', 'mcts.bitboard', 'mcts.ia', 'mcts.main', 'mcts.analise')
+PROIBIDOS = ('textual', 'rich', 'numpy', 'mcts.tela', 'mcts.lote')
+# Orçamento da linha de comando sem interface, do início do interpretador até a jogada impressa
+ORCAMENTO_MS = 100
+
+
+def roda(*argumentos: str) -> subprocess.CompletedProcess[str]:
+    return subprocess.run([sys.executable, *argumentos], capture_output=True, text=True, check=True)  # noqa: S603
+
+
+def tempo_importacao(modulo: str) -> float:
+    # Soma o tempo acumulado das importações de primeiro nível que o -X importtime mostra, em milissegundos
+    total = 0
+    for linha in roda('-X', 'importtime', '-c', f'import {modulo}').stderr.splitlines():
+        if not linha.startswith('import time:'):
+            continue
+        _, acumulado, nome = linha.split('|')
+        if acumulado.strip().isdigit() and not nome.startswith('  '):
+            total += int(acumulado)
+    return total / 1000
+
+
+def carregados(modulo: str) -> list[str]:
+    saida = roda('-c', f'import sys, {modulo}; print(*sys.modules, sep="\\n")').stdout.split()
+    return [
+        nome for nome in saida if any(nome == proibido or nome.startswith(f'{proibido}.') for proibido in PROIBIDOS)
+    ]
+
+
+def tempo_analise() -> float:
+    inicio = perf_counter()
+    roda('-m', 'mcts.analise', '--iteracoes', '1')
+    return (perf_counter() - inicio) * 1000
+
+
+def argumentos_linha_de_comando() -> Namespace:
+    parser = ArgumentParser(description='Confere o tempo de importação do motor e da linha de comando sem interface.')
+    parser.add_argument('--repeticoes', type=int, default=5, help='cada medida fica com a mediana das repetições')
+    parser.add_argument('--orcamento', type=float, default=ORCAMENTO_MS, help='milissegundos para o mcts.analise')
+    return parser.parse_args()
+
+
+def main() -> None:
+    argumentos = argumentos_linha_de_comando()
+    falhas = []
+
+    for modulo in MODULOS:
+        tempo = median(tempo_importacao(modulo) for _ in range(argumentos.repeticoes))
+        proibidos = carregados(modulo)
+        print(f'{modulo}: {tempo:.1f} ms')  # noqa: T201
+        if proibidos:
+            falhas.append(f'{modulo} carrega {", ".join(proibidos)}')
+
+    tempo = median(tempo_analise() for _ in range(argumentos.repeticoes))
+    print(f'mcts.analise --iteracoes 1: {tempo:.1f} ms do início ao fim')  # noqa: T201
+    if tempo > argumentos.orcamento:
+        falhas.append(f'mcts.analise levou {tempo:.1f} ms, acima de {argumentos.orcamento:g} ms')
+
+    if falhas:
+        raise SystemExit('\n'.join(falhas))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+import traceback
+from argparse import ArgumentParser, Namespace
+from random import choice, seed
+from typing import TYPE_CHECKING, Any
+
+from mcts.arvore import IACompacta
+from mcts.bitboard import JogoDaVelhaBitboard, Lig4Bitboard
+from mcts.ia import IA
+from mcts.politica import tatica
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from mcts.jogo import Jogo
+
+ITERACOES = 300
+
+# Cada variante da IA que precisa continuar jogando uma partida inteira
+VARIANTES: dict[str, 'Callable[[], IA[Any]]'] = {
+    'padrao': lambda: IA[Any](0.1, ITERACOES),
+    'arvore_compacta': lambda: IACompacta[Any](0.1, ITERACOES),
+    'processos': lambda: IA[Any](0.1, ITERACOES, processos=2),
+    'compartilhada': lambda: IA[Any](0.1, ITERACOES, processos=2, compartilhada=True),
+    'threads': lambda: IA[Any](0.1, ITERACOES, threads=2),
+    'transposicoes': lambda: IA[Any](0.1, ITERACOES, transposicoes=10000),
+    'rave': lambda: IA[Any](0.1, ITERACOES, rave=300),
+    'resolvedor': lambda: IA[Any](1.0, ITERACOES, resolvedor=True),
+    'parada': lambda: IA[Any](0.1, ITERACOES, parada_visitas=1.0, parada_confianca=0.99),
+    'max_nos': lambda: IA[Any](0.1, ITERACOES, max_nos=100),
+    'max_nos_resolvedor': lambda: IA[Any](1.0, ITERACOES, max_nos=100, resolvedor=True),
+    'politica': lambda: IA[Any](0.1, ITERACOES, politica=tatica),
+    'simetria': lambda: IA[Any](0.1, ITERACOES, simetria=2),
+}
+JOGOS: dict[str, 'Callable[[], Jogo[Any]]'] = {
+    'velha': lambda: JogoDaVelhaBitboard(3, 3),
+    'lig4': lambda: Lig4Bitboard(7, 6, 4),
+}
+
+
+def partida(nova_ia: 'Callable[[], IA[Any]]', novo_jogo: 'Callable[[], Jogo[Any]]', ia_comeca: bool) -> None:
+    # A IA joga contra jogadas sorteadas até o fim, andando a árvore a cada jogada como na interface
+    jogo = novo_jogo()
+    ia = nova_ia()
+    try:
+        while not jogo.acabou():
+            jogada = ia.escolhe_jogada(jogo) if jogo.jogador == ia_comeca else choice(list(jogo.lista_jogadas()))
+            jogo.joga(jogada)
+            ia.avanca(jogada)
+    finally:
+        ia.encerra()
+
+
+def argumentos_linha_de_comando() -> Namespace:
+    parser = ArgumentParser(description='Joga partidas inteiras com cada variante da IA, procurando erros.')
+    parser.add_argument('variantes', nargs='*', choices=VARIANTES, help='só essas variantes')
+    parser.add_argument('--partidas', type=int, default=4, help='partidas por variante e jogo, alternando quem começa')
+    parser.add_argument('--semente', type=int, default=0)
+    return parser.parse_args()
+
+
+def main() -> None:
+    argumentos = argumentos_linha_de_comando()
+    falhas = []
+    for nome in argumentos.variantes or VARIANTES:
+        for nome_jogo, novo_jogo in JOGOS.items():
+            erros = 0
+            for i in range(argumentos.partidas):
+                seed(f'{argumentos.semente}:{nome}:{nome_jogo}:{i}')
+                try:
+                    partida(VARIANTES[nome], novo_jogo, i % 2 == 0)
+                except Exception:  # noqa: BLE001
+                    erros += 1
+                    falhas.append(f'{nome} no {nome_jogo}, partida {i}:\n{traceback.format_exc()}')
+            print(f'{nome} no {nome_jogo}: {argumentos.partidas - erros}/{argumentos.partidas}')  # noqa: T201
+
+    if falhas:
+        raise SystemExit('\n'.join(falhas))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+from argparse import ArgumentParser, Namespace
+from random import Random
+from typing import TYPE_CHECKING
+
+from mcts.bitboard import JogoDaVelhaBitboard
+from mcts.jogo import JogadaJogoDaVelha, Jogo, JogoDaVelha
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+TABULEIROS = ((3, 3), (4, 3), (5, 4), (7, 5), (15, 5))
+IMPLEMENTACOES: dict[str, 'Callable[[int, int], Jogo[JogadaJogoDaVelha]]'] = {
+    'JogoDaVelha': JogoDaVelha,
+    'JogoDaVelhaBitboard': JogoDaVelhaBitboard,
+}
+
+
+def varre(tabuleiro: list[list[bool | None]], pontos_pra_ganhar: int) -> bool | None:
+    # A verificação antiga: tenta estender linha, coluna e as duas diagonais a partir de cada peça
+    tamanho = len(tabuleiro)
+    for i in range(tamanho):
+        for j in range(tamanho):
+            if tabuleiro[i][j] is None:
+                continue
+            for x, y in [(0, 1), (1, 0), (1, 1), (-1, 1)]:
+                pontos = 1
+                a, b = i + x, j + y
+                while 0 <= a < tamanho and 0 <= b < tamanho and tabuleiro[a][b] == tabuleiro[i][j]:
+                    pontos += 1
+                    a, b = a + x, b + y
+                if pontos >= pontos_pra_ganhar:
+                    return tabuleiro[i][j]
+    return None
+
+
+def confere(jogo: Jogo[JogadaJogoDaVelha], tabuleiro: list[list[bool | None]], pontos_pra_ganhar: int) -> str | None:
+    esperado = varre(tabuleiro, pontos_pra_ganhar)
+    cheio = all(casa is not None for linha in tabuleiro for casa in linha)
+    if jogo.ganhador() != esperado:
+        return f'ganhador {jogo.ganhador()}, a varredura dá {esperado}'
+    if jogo.acabou() != (esperado is not None or cheio):
+        return f'acabou {jogo.acabou()}, a varredura dá {esperado is not None or cheio}'
+    return None
+
+
+def partida(
+    novo_jogo: 'Callable[[int, int], Jogo[JogadaJogoDaVelha]]', tamanho: int, pontos_pra_ganhar: int, gerador: Random
+) -> str | None:
+    # Joga ao acaso conferindo cada posição; de vez em quando desfaz algumas jogadas para conferir o desfaz também
+    jogo = novo_jogo(tamanho, pontos_pra_ganhar)
+    tabuleiro: list[list[bool | None]] = [[None] * tamanho for _ in range(tamanho)]
+    jogadas: list[JogadaJogoDaVelha] = []
+    while not jogo.acabou():
+        jogada = gerador.choice(sorted(jogo.lista_jogadas()))
+        x, y = jogada
+        tabuleiro[x][y] = jogo.jogador
+        jogo.joga(jogada)
+        jogadas.append(jogada)
+        erro = confere(jogo, tabuleiro, pontos_pra_ganhar)
+        if erro is None and gerador.random() < 0.1:  # noqa: PLR2004
+            for _ in range(gerador.randint(1, len(jogadas))):
+                x, y = jogadas.pop()
+                tabuleiro[x][y] = None
+                jogo.desfaz((x, y))
+            erro = confere(jogo, tabuleiro, pontos_pra_ganhar)
+        if erro is not None:
+            return f'{erro} depois de {jogadas}'
+    return None
+
+
+def argumentos_linha_de_comando() -> Namespace:
+    parser = ArgumentParser(
+        description='Confere a verificação incremental do ganhador do jogo da velha contra a varredura do tabuleiro.'
+    )
+    parser.add_argument('--partidas', type=int, default=30, help='partidas aleatórias por tabuleiro e implementação')
+    parser.add_argument('--semente', type=int, default=0)
+    return parser.parse_args()
+
+
+def main() -> None:
+    argumentos = argumentos_linha_de_comando()
+    falhas: list[str] = []
+    for nome, novo_jogo in IMPLEMENTACOES.items():
+        for tamanho, pontos in TABULEIROS:
+            gerador = Random(f'{argumentos.semente}:{nome}:{tamanho}:{pontos}')
+            erros = [
+                erro
+                for _ in range(argumentos.partidas)
+                if (erro := partida(novo_jogo, tamanho, pontos, gerador)) is not None
+            ]
+            print(f'{nome} {tamanho}x{tamanho} com {pontos}: {argumentos.partidas - len(erros)}/{argumentos.partidas}')  # noqa: T201
+            falhas.extend(f'{nome} {tamanho}x{tamanho} com {pontos}: {erro}' for erro in erros[:3])
+
+    if falhas:
+        raise SystemExit('\n'.join(falhas))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+import json
+from argparse import ArgumentParser, Namespace
+from typing import TYPE_CHECKING, Any
+
+from mcts.bitboard import JogoDaVelhaBitboard, Lig4Bitboard
+from mcts.ia import IA
+
+if TYPE_CHECKING:
+    from mcts.jogo import Jogo
+
+
+def le_jogada(tipo: str, texto: str) -> object:
+    if tipo == 'velha':
+        x, y = texto.split(',')
+        return (int(x), int(y))
+    return int(texto)
+
+
+def escreve_jogada(jogada: object) -> str:
+    return ','.join(map(str, jogada)) if isinstance(jogada, tuple) else str(jogada)
+
+
+def novo_jogo(argumentos: Namespace) -> 'Jogo[Any]':
+    if argumentos.jogo == 'velha':
+        return JogoDaVelhaBitboard(argumentos.tamanho, argumentos.pontos, argumentos.vizinhanca)
+    return Lig4Bitboard(argumentos.colunas, argumentos.linhas, argumentos.casas)
+
+
+def argumentos_linha_de_comando() -> Namespace:
+    parser = ArgumentParser(description='Escolhe a jogada da IA para uma posição, sem a interface.')
+    parser.add_argument('jogadas', nargs='*', help='jogadas até a posição: x,y no jogo da velha, a coluna no lig4')
+    parser.add_argument('--jogo', choices=('velha', 'lig4'), default='velha')
+    parser.add_argument('--tamanho', type=int, default=3)
+    parser.add_argument('--pontos', type=int, default=3)
+    parser.add_argument('--vizinhanca', type=int, help='só casas a até essa distância das peças')
+    parser.add_argument('--colunas', type=int, default=7)
+    parser.add_argument('--linhas', type=int, default=6)
+    parser.add_argument('--casas', type=int, default=4)
+    parser.add_argument('--c', type=float, default=0.1)
+    parser.add_argument('--iteracoes', type=int, default=1000)
+    parser.add_argument('--tempo', type=int, help='tempo da busca em milissegundos, no lugar das iterações')
+    parser.add_argument('--json', action='store_true', help='mostra também as visitas de cada jogada')
+    return parser.parse_args()
+
+
+def main() -> None:
+    argumentos = argumentos_linha_de_comando()
+    jogo = novo_jogo(argumentos)
+    for texto in argumentos.jogadas:
+        jogo.joga(le_jogada(argumentos.jogo, texto))
+    if jogo.acabou():
+        raise SystemExit('A partida já acabou')
+
+    ia = IA[Any](argumentos.c, argumentos.iteracoes, tempo_limite=argumentos.tempo)
+    jogada = ia.escolhe_jogada(jogo)
+    if not argumentos.json:
+        print(escreve_jogada(jogada))  # noqa: T201
+        return
+
+    filhos = sorted(ia.arvore.filhos.items(), key=lambda item: item[1].visitas, reverse=True)
+    resultado = {
+        'jogada': escreve_jogada(jogada),
+        'visitas': ia.arvore.visitas,
+        'filhos': {escreve_jogada(jogada_filho): filho.visitas for jogada_filho, filho in filhos},
+    }
+    print(json.dumps(resultado, ensure_ascii=False))  # noqa: T201
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+import json
+from argparse import ArgumentParser, Namespace
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from functools import partial
+from itertools import combinations
+from math import log10, sqrt
+from pathlib import Path
+from random import Random, randrange, seed
+from typing import TYPE_CHECKING, Any
+
+from mcts.arvore import IACompacta
+from mcts.bitboard import JogoDaVelhaBitboard, Lig4Bitboard
+from mcts.ia import IA
+from mcts.livro import LivroAberturas
+from mcts.politica import POLITICAS
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from mcts.jogo import Jogo
+
+OPCOES = frozenset(
+    (
+        'c',
+        'max_iteracoes',
+        'tempo_limite',
+        'threads',
+        'transposicoes',
+        'lote',
+        'arvore_compacta',
+        'livro',
+        'rave',
+        'resolvedor',
+        'parada_visitas',
+        'parada_confianca',
+        'max_nos',
+        'poda',
+        'politica',
+        'simetria',
+    )
+)
+ITERACOES_ELO = 1000
+TOLERANCIA_ELO = 1e-9
+
+# Opções vindas do JSON, passadas como argumentos nomeados para a IA
+Configuracao = dict[str, Any]
+
+
+def valida(nome: str, configuracao: Configuracao) -> None:
+    desconhecidas = configuracao.keys() - OPCOES
+    if desconhecidas:
+        raise ValueError(f'Opções desconhecidas em {nome}: {", ".join(sorted(desconhecidas))}')
+    if 'c' not in configuracao or 'max_iteracoes' not in configuracao:
+        raise ValueError(f'A configuração {nome} precisa de c e max_iteracoes')
+
+
+def cria_ia[Jogada](configuracao: Configuracao) -> IA[Jogada]:
+    opcoes = dict(configuracao)
+    c = float(opcoes.pop('c'))
+    max_iteracoes = int(opcoes.pop('max_iteracoes'))
+    caminho_livro = opcoes.pop('livro', None)
+    livro = LivroAberturas(str(caminho_livro)) if caminho_livro is not None else None
+    nome_politica = opcoes.pop('politica', None)
+    politica = POLITICAS[nome_politica] if nome_politica is not None else None
+
+    if opcoes.pop('arvore_compacta', False):
+        return IACompacta[Jogada](c, max_iteracoes, livro=livro, politica=politica, **opcoes)
+    return IA[Jogada](c, max_iteracoes, livro=livro, politica=politica, **opcoes)
+
+
+def _partida[Jogada](
+    novo_jogo: 'Callable[[], Jogo[Jogada]]', primeira: Configuracao, segunda: Configuracao, semente: int
+) -> tuple[float, int]:
+    # Devolve o resultado do ponto de vista de quem começou e a quantidade de jogadas
+    seed(semente)
+
+    jogo = novo_jogo()
+    ias: dict[bool, IA[Jogada]] = {True: cria_ia(primeira), False: cria_ia(segunda)}
+    jogadas = 0
+    while not jogo.acabou():
+        jogada = ias[jogo.jogador].escolhe_jogada(jogo)
+        jogo.joga(jogada)
+        for ia in ias.values():
+            ia.avanca(jogada)
+        jogadas += 1
+
+    for ia in ias.values():
+        ia.encerra()
+
+    ganhador = jogo.ganhador()
+    if ganhador is None:
+        return (0.5, jogadas)
+    return (1.0 if ganhador else 0.0, jogadas)
+
+
+def le_resultados(caminho: Path) -> list[dict[str, Any]]:
+    if not caminho.exists():
+        return []
+
+    resultados = []
+    with caminho.open(encoding='utf-8') as arquivo:
+        for linha in arquivo:
+            try:
+                resultados.append(json.loads(linha))
+            except json.JSONDecodeError:
+                # A última linha pode ter ficado pela metade se a execução foi interrompida
+                continue
+    return resultados
+
+
+def calcula_elo(nomes: list[str], partidas: list[tuple[str, str, float]]) -> dict[str, float]:
+    # Máxima verossimilhança do modelo de Bradley-Terry pelo algoritmo MM, contando o empate como meia
+    # vitória. Um empate virtual entre cada par evita força zero para quem não pontuou
+    indices = {nome: i for i, nome in enumerate(nomes)}
+    quantidade = len(nomes)
+    pontos = [0.0] * quantidade
+    jogos = [[0.0] * quantidade for _ in range(quantidade)]
+    for i, j in combinations(range(quantidade), 2):
+        pontos[i] += 0.5
+        pontos[j] += 0.5
+        jogos[i][j] += 1
+        jogos[j][i] += 1
+    for primeiro, segundo, resultado in partidas:
+        i, j = indices[primeiro], indices[segundo]
+        pontos[i] += resultado
+        pontos[j] += 1 - resultado
+        jogos[i][j] += 1
+        jogos[j][i] += 1
+
+    forcas = [1.0] * quantidade
+    for _ in range(ITERACOES_ELO):
+        novas = [
+            pontos[i] / sum(jogos[i][j] / (forcas[i] + forcas[j]) for j in range(quantidade) if j != i)
+            for i in range(quantidade)
+        ]
+        media = sum(log10(forca) for forca in novas) / quantidade
+        novas = [forca / 10**media for forca in novas]
+        variacao = max(abs(nova - forca) for nova, forca in zip(novas, forcas, strict=True))
+        forcas = novas
+        if variacao < TOLERANCIA_ELO:
+            break
+
+    return {nome: 400 * log10(forcas[i]) for nome, i in indices.items()}
+
+
+def erros_elo(
+    nomes: list[str], partidas: list[tuple[str, str, float]], reamostras: int, gerador: Random
+) -> dict[str, float]:
+    # Desvio padrão do Elo entre reamostragens das partidas (bootstrap)
+    amostras: dict[str, list[float]] = {nome: [] for nome in nomes}
+    for _ in range(reamostras):
+        reamostra = [gerador.choice(partidas) for _ in partidas]
+        for nome, elo in calcula_elo(nomes, reamostra).items():
+            amostras[nome].append(elo)
+
+    erros = {}
+    for nome, valores in amostras.items():
+        media = sum(valores) / len(valores) if valores else 0.0
+        erros[nome] = sqrt(sum((valor - media) ** 2 for valor in valores) / len(valores)) if valores else 0.0
+    return erros
+
+
+def agenda(nomes: list[str], partidas_por_par: int) -> list[tuple[str, str, str]]:
+    # Cada par joga partidas_por_par vezes, alternando quem começa
+    rodadas = []
+    for a, b in combinations(nomes, 2):
+        for i in range(partidas_por_par):
+            primeiro, segundo = (a, b) if i % 2 == 0 else (b, a)
+            rodadas.append((f'{a}|{b}|{i}', primeiro, segundo))
+    return rodadas
+
+
+def joga_rodadas[Jogada](
+    novo_jogo: 'Callable[[], Jogo[Jogada]]',
+    configuracoes: dict[str, Configuracao],
+    pendentes: list[tuple[str, str, str]],
+    argumentos: Namespace,
+) -> None:
+    with (
+        argumentos.saida.open('a', encoding='utf-8') as arquivo,
+        ProcessPoolExecutor(argumentos.processos) as executor,
+    ):
+        futuros: dict[Future[tuple[float, int]], dict[str, object]] = {}
+        for identificador, primeiro, segundo in pendentes:
+            semente = (
+                Random(f'{argumentos.semente}:{identificador}').getrandbits(32)
+                if argumentos.semente is not None
+                else randrange(2**32)
+            )
+            futuro = executor.submit(_partida, novo_jogo, configuracoes[primeiro], configuracoes[segundo], semente)
+            futuros[futuro] = {'id': identificador, 'primeiro': primeiro, 'segundo': segundo, 'semente': semente}
+
+        try:
+            restantes = set(futuros)
+            while restantes:
+                prontos, restantes = wait(restantes, return_when=FIRST_COMPLETED)
+                for futuro in prontos:
+                    resultado, jogadas = futuro.result()
+                    linha = futuros[futuro] | {'resultado': resultado, 'jogadas': jogadas}
+                    arquivo.write(json.dumps(linha, ensure_ascii=False) + '\n')
+                    arquivo.flush()
+        except KeyboardInterrupt:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+
+def argumentos_linha_de_comando() -> Namespace:
+    parser = ArgumentParser(description='Torneio todos contra todos entre configurações da IA, com Elo.')
+    parser.add_argument('configuracoes', type=Path, help='JSON com um objeto de opções da IA para cada nome')
+    parser.add_argument('saida', type=Path, help='JSONL com uma partida por linha; se já existir, continua dele')
+    parser.add_argument('--jogo', choices=('velha', 'lig4'), default='velha')
+    parser.add_argument('--tamanho', type=int, default=3)
+    parser.add_argument('--pontos', type=int, default=3)
+    parser.add_argument('--vizinhanca', type=int, help='só casas a até essa distância das peças')
+    parser.add_argument('--colunas', type=int, default=7)
+    parser.add_argument('--linhas', type=int, default=6)
+    parser.add_argument('--casas', type=int, default=4)
+    parser.add_argument('--partidas', type=int, default=10, help='partidas por par de configurações')
+    parser.add_argument('--processos', type=int, default=1)
+    parser.add_argument('--reamostras', type=int, default=200, help='reamostragens para o erro do Elo')
+    parser.add_argument('--semente', type=int)
+    return parser.parse_args()
+
+
+def main() -> None:
+    argumentos = argumentos_linha_de_comando()
+    configuracoes: dict[str, Configuracao] = json.loads(argumentos.configuracoes.read_text(encoding='utf-8'))
+    if len(configuracoes) < 2:  # noqa: PLR2004
+        raise ValueError('O torneio precisa de pelo menos duas configurações')
+    for nome, configuracao in configuracoes.items():
+        valida(nome, configuracao)
+    nomes = list(configuracoes)
+
+    feitas = {resultado['id'] for resultado in le_resultados(argumentos.saida)}
+    pendentes = [rodada for rodada in agenda(nomes, argumentos.partidas) if rodada[0] not in feitas]
+    if pendentes and argumentos.jogo == 'velha':
+        velha = partial(JogoDaVelhaBitboard, argumentos.tamanho, argumentos.pontos, argumentos.vizinhanca)
+        joga_rodadas(velha, configuracoes, pendentes, argumentos)
+    elif pendentes:
+        lig4 = partial(Lig4Bitboard, argumentos.colunas, argumentos.linhas, argumentos.casas)
+        joga_rodadas(lig4, configuracoes, pendentes, argumentos)
+
+    partidas = [
+        (resultado['primeiro'], resultado['segundo'], float(resultado['resultado']))
+        for resultado in le_resultados(argumentos.saida)
+        if resultado['primeiro'] in configuracoes and resultado['segundo'] in configuracoes
+    ]
+    elos = calcula_elo(nomes, partidas)
+    erros = erros_elo(nomes, partidas, argumentos.reamostras, Random(argumentos.semente))
+
+    print(f'{len(partidas)} partidas')  # noqa: T201
+    for nome in sorted(nomes, key=elos.__getitem__, reverse=True):
+        jogos = sum(nome in (primeiro, segundo) for primeiro, segundo, _ in partidas)
+        pontos = sum(
+            resultado if nome == primeiro else 1 - resultado
+            for primeiro, segundo, resultado in partidas
+            if nome in (primeiro, segundo)
+        )
+        print(f'{nome}: {elos[nome]:+.0f} ± {erros[nome]:.0f} ({pontos:g}/{jogos})')  # noqa: T201
+
+
+if __name__ == '__main__':
+    main()
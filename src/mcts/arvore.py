@@ -0,0 +1,235 @@
+from array import array
+from math import sqrt
+from random import choice
+
+from mcts.ia import IA, No
+from mcts.jogo import Jogo
+from mcts.livro import LivroAberturas
+from mcts.politica import Politica
+
+SEM_NO = -1
+# Opções de IA que a árvore compacta não implementa, com o valor que as desliga: ligadas, passariam por métodos
+# de IA que leem e escrevem em No e não nos vetores
+DESLIGADAS: dict[str, object] = {
+    'processos': 1,
+    'threads': 1,
+    'compartilhada': False,
+    'transposicoes': None,
+    'lote': 1,
+    'coleta_estatisticas': False,
+    'rave': None,
+    'resolvedor': False,
+    'parada_visitas': None,
+    'parada_confianca': None,
+    'max_nos': None,
+    'simetria': None,
+}
+
+
+class ArvoreCompacta[Jogada]:
+    # Estrutura de vetores: o nó é só um índice e cada campo fica num array contíguo, sem um objeto
+    # python por nó. Os filhos formam uma lista ligada por primeiro filho e próximo irmão
+    def __init__(self) -> None:
+        self.visitas = array('i')
+        self.somas = array('d')
+        self.pais = array('i')
+        self.primeiros_filhos = array('i')
+        self.proximos_irmaos = array('i')
+        self.quantidade_filhos = array('i')
+        self.jogadas = array('i')
+
+        self.codigos: dict[Jogada, int] = {}
+        self.jogadas_por_codigo: list[Jogada] = []
+
+        self.novo_no(SEM_NO, SEM_NO)
+
+    def __len__(self) -> int:
+        return len(self.visitas)
+
+    def codigo(self, jogada: Jogada) -> int:
+        codigo = self.codigos.get(jogada)
+        if codigo is None:
+            codigo = len(self.jogadas_por_codigo)
+            self.codigos[jogada] = codigo
+            self.jogadas_por_codigo.append(jogada)
+        return codigo
+
+    def jogada(self, no: int) -> Jogada:
+        return self.jogadas_por_codigo[self.jogadas[no]]
+
+    def novo_no(self, pai: int, codigo: int) -> int:
+        self.visitas.append(0)
+        self.somas.append(0.0)
+        self.pais.append(pai)
+        self.primeiros_filhos.append(SEM_NO)
+        self.proximos_irmaos.append(SEM_NO)
+        self.quantidade_filhos.append(0)
+        self.jogadas.append(codigo)
+        return len(self.visitas) - 1
+
+    def adiciona_filho(self, no: int, jogada: Jogada) -> int:
+        filho = self.novo_no(no, self.codigo(jogada))
+        self.proximos_irmaos[filho] = self.primeiros_filhos[no]
+        self.primeiros_filhos[no] = filho
+        self.quantidade_filhos[no] += 1
+        return filho
+
+    def filhos(self, no: int) -> list[int]:
+        filhos = []
+        filho = self.primeiros_filhos[no]
+        while filho != SEM_NO:
+            filhos.append(filho)
+            filho = self.proximos_irmaos[filho]
+        return filhos
+
+    def filho(self, no: int, jogada: Jogada) -> int:
+        codigo = self.codigos.get(jogada)
+        filho = self.primeiros_filhos[no]
+        while filho != SEM_NO and self.jogadas[filho] != codigo:
+            filho = self.proximos_irmaos[filho]
+        return filho
+
+    def subarvore(self, raiz: int) -> 'ArvoreCompacta[Jogada]':
+        # Copia só os descendentes de raiz para uma árvore nova, liberando o resto
+        nova = ArvoreCompacta[Jogada]()
+        nova.visitas[0] = self.visitas[raiz]
+        nova.somas[0] = self.somas[raiz]
+
+        pilha = [(raiz, 0)]
+        while pilha:
+            antigo, novo = pilha.pop()
+            for filho in reversed(self.filhos(antigo)):
+                copia = nova.adiciona_filho(novo, self.jogada(filho))
+                nova.visitas[copia] = self.visitas[filho]
+                nova.somas[copia] = self.somas[filho]
+                pilha.append((filho, copia))
+
+        return nova
+
+
+class NoCompacto[Jogada](No[Jogada]):
+    # Visão de um nó da árvore compacta com a mesma interface de No, para quem percorre a árvore. O IACompacta
+    # não tem o resolvedor, então nenhum nó fica provado
+    resolvido: float | None = None
+
+    def __init__(self, arvore: ArvoreCompacta[Jogada], indice: int) -> None:
+        self.arvore = arvore
+        self.indice = indice
+        self.perdas_virtuais = 0
+        self.cache_filhos: dict[Jogada, No[Jogada]] | None = None
+
+    @property
+    def visitas(self) -> int:
+        return self.arvore.visitas[self.indice]
+
+    @visitas.setter
+    def visitas(self, visitas: int) -> None:
+        self.arvore.visitas[self.indice] = visitas
+
+    @property
+    def pontuacao(self) -> float:
+        visitas = self.arvore.visitas[self.indice]
+        return self.arvore.somas[self.indice] / visitas if visitas else 0.0
+
+    @pontuacao.setter
+    def pontuacao(self, pontuacao: float) -> None:
+        self.arvore.somas[self.indice] = pontuacao * self.arvore.visitas[self.indice]
+
+    @property
+    def pai(self) -> 'NoCompacto[Jogada] | None':
+        pai = self.arvore.pais[self.indice]
+        return None if pai == SEM_NO else NoCompacto(self.arvore, pai)
+
+    @pai.setter
+    def pai(self, _pai: No[Jogada] | None) -> None:
+        raise AttributeError('A árvore compacta só muda pelo IACompacta')
+
+    @property
+    def filhos(self) -> dict[Jogada, No[Jogada]]:
+        # Filhos só são acrescentados, nunca removidos, então a quantidade diz se o dicionário guardado ainda vale
+        if self.cache_filhos is None or len(self.cache_filhos) != self.arvore.quantidade_filhos[self.indice]:
+            self.cache_filhos = {
+                self.arvore.jogada(filho): NoCompacto(self.arvore, filho) for filho in self.arvore.filhos(self.indice)
+            }
+        return self.cache_filhos
+
+    @filhos.setter
+    def filhos(self, _filhos: dict[Jogada, No[Jogada]]) -> None:
+        raise AttributeError('A árvore compacta só muda pelo IACompacta')
+
+
+class IACompacta[Jogada](IA[Jogada]):
+    def __init__(  # noqa: PLR0913
+        self,
+        c: float,
+        max_iteracoes: int,
+        tempo_limite: int | None = None,
+        livro: LivroAberturas | None = None,
+        politica: Politica[Jogada] | None = None,
+        poda: bool = True,  # noqa: ARG002 sem max_nos, a poda não faz nada
+        **opcoes: object,
+    ) -> None:
+        desconhecidas = opcoes.keys() - DESLIGADAS.keys()
+        if desconhecidas:
+            raise TypeError(f'Opções desconhecidas: {", ".join(sorted(desconhecidas))}')
+        ligadas = sorted(nome for nome, valor in opcoes.items() if valor != DESLIGADAS[nome])
+        if ligadas:
+            raise ValueError(f'A árvore compacta não implementa {", ".join(ligadas)}')
+
+        super().__init__(c, max_iteracoes, tempo_limite=tempo_limite, livro=livro, politica=politica)
+        self.nos = ArvoreCompacta[Jogada]()
+        self.arvore = NoCompacto(self.nos, 0)
+
+    def itera(self, jogo: Jogo[Jogada]) -> None:
+        nos = self.nos
+        no = 0
+        historico: list[Jogada] = []
+
+        while not jogo.acabou() and nos.quantidade_filhos[no] == len(jogo.lista_jogadas()):
+            melhor_filho = SEM_NO
+            maior_intervalo = -1.0
+            filho = nos.primeiros_filhos[no]
+            while filho != SEM_NO:
+                visitas = nos.visitas[filho]
+                intervalo = nos.somas[filho] / visitas + self.c * sqrt(nos.visitas[no] / visitas)
+                if intervalo > maior_intervalo:
+                    maior_intervalo = intervalo
+                    melhor_filho = filho
+                filho = nos.proximos_irmaos[filho]
+
+            if melhor_filho == SEM_NO:
+                raise RuntimeError('Sem jogada disponível')
+
+            no = melhor_filho
+            jogada = nos.jogada(no)
+            jogo.joga(jogada)
+            historico.append(jogada)
+
+        if not jogo.acabou():
+            expandidas = {nos.jogada(filho) for filho in nos.filhos(no)}
+            jogada = choice(list(jogo.lista_jogadas().difference(expandidas)))
+            no = nos.adiciona_filho(no, jogada)
+            jogo.joga(jogada)
+            historico.append(jogada)
+
+        resultado = self.simulacao(jogo, historico)
+
+        while no != SEM_NO:
+            nos.visitas[no] += 1
+            nos.somas[no] += resultado
+            no = nos.pais[no]
+            resultado = 1.0 - resultado
+
+        for jogada in reversed(historico):
+            jogo.desfaz(jogada)
+
+    def reinicia(self) -> None:
+        self.para_ponderacao()
+        self.nos = ArvoreCompacta[Jogada]()
+        self.arvore = NoCompacto(self.nos, 0)
+
+    def avanca(self, jogada: Jogada) -> None:
+        self.para_ponderacao()
+        filho = self.nos.filho(0, jogada)
+        self.nos = ArvoreCompacta[Jogada]() if filho == SEM_NO else self.nos.subarvore(filho)
+        self.arvore = NoCompacto(self.nos, 0)
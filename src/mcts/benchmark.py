@@ -0,0 +1,305 @@
+import json
+import tracemalloc
+from argparse import ArgumentParser, ArgumentTypeError, Namespace
+from cProfile import Profile
+from math import sqrt
+from platform import python_version
+from random import choice, seed
+from typing import TYPE_CHECKING
+
+from mcts.bitboard import JogoDaVelhaBitboard, Lig4Bitboard
+from mcts.estatisticas import Estatisticas
+from mcts.ia import IA
+from mcts.jogo import JogadaJogoDaVelha, JogadaLig4, Jogo, JogoDaVelha, Lig4
+from mcts.politica import POLITICAS
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+# Quantil da normal para os intervalos de 95% de confiança
+Z = 1.959963984540054
+
+
+def intervalo_wilson(sucessos: int, total: int) -> tuple[float, float]:
+    if total == 0:
+        return (0.0, 1.0)
+
+    proporcao = sucessos / total
+    z2 = Z * Z
+    centro = (proporcao + z2 / (2 * total)) / (1 + z2 / total)
+    margem = Z * sqrt(proporcao * (1 - proporcao) / total + z2 / (4 * total * total)) / (1 + z2 / total)
+    return (max(0.0, centro - margem), min(1.0, centro + margem))
+
+
+def taxa(sucessos: int, total: int) -> dict[str, object]:
+    return {'valor': sucessos / total if total else 0.0, 'intervalo_95': intervalo_wilson(sucessos, total)}
+
+
+def partida[Jogada](
+    jogo: Jogo[Jogada],
+    candidata: IA[Jogada],
+    adversario: IA[Jogada] | None,
+    candidata_comeca: bool,
+    estatisticas: Estatisticas,
+) -> float:
+    # Devolve o resultado do ponto de vista da candidata: 1 vitória, 0.5 empate e 0 derrota
+    while not jogo.acabou():
+        if jogo.jogador == candidata_comeca:
+            jogada = candidata.escolhe_jogada(jogo)
+            if candidata.estatisticas is not None:
+                estatisticas.acumula(candidata.estatisticas)
+        elif adversario is None:
+            jogada = choice(list(jogo.lista_jogadas()))
+        else:
+            jogada = adversario.escolhe_jogada(jogo)
+
+        jogo.joga(jogada)
+        candidata.avanca(jogada)
+        if adversario is not None:
+            adversario.avanca(jogada)
+
+    ganhador = jogo.ganhador()
+    if ganhador is None:
+        return 0.5
+    return 1.0 if ganhador == candidata_comeca else 0.0
+
+
+def candidata[Jogada](c: float, max_iteracoes: int, tempo_limite: int | None, argumentos: Namespace) -> IA[Jogada]:
+    # A IA medida, com as opções da linha de comando
+    return IA[Jogada](
+        c,
+        max_iteracoes,
+        tempo_limite=tempo_limite,
+        processos=argumentos.processos,
+        threads=argumentos.threads,
+        compartilhada=argumentos.compartilhada,
+        coleta_estatisticas=True,
+        rave=argumentos.rave,
+        resolvedor=argumentos.resolvedor,
+        parada_visitas=argumentos.parada_visitas,
+        parada_confianca=argumentos.parada_confianca,
+        max_nos=argumentos.max_nos,
+        poda=not argumentos.sem_poda,
+        politica=POLITICAS[argumentos.politica] if argumentos.politica is not None else None,
+        simetria=argumentos.simetria,
+    )
+
+
+def memoria_pico[Jogada](
+    novo_jogo: 'Callable[[], Jogo[Jogada]]',
+    c: float,
+    max_iteracoes: int,
+    tempo_limite: int | None,
+    argumentos: Namespace,
+) -> int:
+    # Pico de memória alocada numa busca da IA medida a partir da posição inicial; fica fora das partidas
+    # porque o tracemalloc deixa tudo bem mais lento
+    jogo = novo_jogo()
+    ia: IA[Jogada] = candidata(c, max_iteracoes, tempo_limite, argumentos)
+    tracemalloc.start()
+    try:
+        ia.escolhe_jogada(jogo)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        ia.encerra()
+    return pico
+
+
+def mede[Jogada](  # noqa: PLR0913
+    novo_jogo: 'Callable[[], Jogo[Jogada]]',
+    c: float,
+    max_iteracoes: int,
+    tempo_limite: int | None,
+    argumentos: Namespace,
+    perfil: Profile | None,
+) -> dict[str, object]:
+    vitorias = empates = derrotas = 0
+    estatisticas = Estatisticas()
+
+    for i in range(argumentos.partidas):
+        ia: IA[Jogada] = candidata(c, max_iteracoes, tempo_limite, argumentos)
+        ia.perfil = perfil
+        adversario = None
+        if argumentos.adversario == 'ia':
+            adversario = IA[Jogada](
+                argumentos.c_adversario,
+                argumentos.iteracoes_adversario,
+                tempo_limite=argumentos.tempo_adversario,
+                politica=POLITICAS[argumentos.politica_adversario]
+                if argumentos.politica_adversario is not None
+                else None,
+            )
+
+        # As cores se alternam para não favorecer quem começa
+        try:
+            resultado = partida(novo_jogo(), ia, adversario, i % 2 == 0, estatisticas)
+        finally:
+            ia.encerra()
+            if adversario is not None:
+                adversario.encerra()
+        if resultado == 1.0:
+            vitorias += 1
+        elif resultado == 0.0:
+            derrotas += 1
+        else:
+            empates += 1
+
+    ns_por_fase = estatisticas.ns_por_iteracao()
+    # O próprio laço da busca, a escolha da jogada e a coleta
+    outros = estatisticas.tempo_total - sum(estatisticas.tempos.values())
+    ns_por_fase['outros'] = outros / estatisticas.iteracoes if estatisticas.iteracoes else 0.0
+
+    return {
+        'c': c,
+        'max_iteracoes': max_iteracoes if tempo_limite is None else None,
+        'tempo_limite_ms': tempo_limite,
+        'partidas': argumentos.partidas,
+        'vitorias': vitorias,
+        'empates': empates,
+        'derrotas': derrotas,
+        'taxa_vitorias': taxa(vitorias, argumentos.partidas),
+        'taxa_empates': taxa(empates, argumentos.partidas),
+        'taxa_derrotas': taxa(derrotas, argumentos.partidas),
+        'iteracoes': estatisticas.iteracoes,
+        'iteracoes_por_segundo': estatisticas.iteracoes_por_segundo,
+        'iteracoes_poupadas': estatisticas.iteracoes_poupadas,
+        'tempo_total_ms': estatisticas.tempo_total / 1e6,
+        'ns_por_fase': ns_por_fase,
+        'profundidade_media': estatisticas.profundidade_media,
+        'profundidade_maxima': estatisticas.profundidade_maxima,
+        'ramificacao_media': estatisticas.ramificacao_media,
+        'memoria_pico_bytes': memoria_pico(novo_jogo, c, max_iteracoes, tempo_limite, argumentos),
+    }
+
+
+def fabrica_jogo_da_velha(
+    tamanho: int, pontos_pra_ganhar: int, bitboard: bool, vizinhanca: int | None
+) -> 'Callable[[], Jogo[JogadaJogoDaVelha]]':
+    if bitboard:
+        return lambda: JogoDaVelhaBitboard(tamanho, pontos_pra_ganhar, vizinhanca)
+    return lambda: JogoDaVelha(tamanho, pontos_pra_ganhar, vizinhanca)
+
+
+def fabrica_lig4(colunas: int, linhas: int, casas_pra_ganhar: int, bitboard: bool) -> 'Callable[[], Jogo[JogadaLig4]]':
+    if bitboard:
+        return lambda: Lig4Bitboard(colunas, linhas, casas_pra_ganhar)
+    return lambda: Lig4(colunas, linhas, casas_pra_ganhar)
+
+
+def dimensoes_jogo_da_velha(texto: str) -> tuple[int, int]:
+    # TAMANHO:PONTOS, por exemplo 3:3
+    try:
+        tamanho, pontos = texto.split(':')
+        return (int(tamanho), int(pontos))
+    except ValueError:
+        raise ArgumentTypeError(f'Dimensões inválidas: {texto}, use TAMANHO:PONTOS') from None
+
+
+def dimensoes_lig4(texto: str) -> tuple[int, int, int]:
+    # COLUNASxLINHAS:CASAS, por exemplo 7x6:4
+    try:
+        tabuleiro, casas = texto.split(':')
+        colunas, linhas = tabuleiro.split('x')
+        return (int(colunas), int(linhas), int(casas))
+    except ValueError:
+        raise ArgumentTypeError(f'Dimensões inválidas: {texto}, use COLUNASxLINHAS:CASAS') from None
+
+
+def argumentos_linha_de_comando() -> Namespace:
+    parser = ArgumentParser(description='Mede a IA sem abrir a interface e escreve o resultado em JSON.')
+    parser.add_argument('--jogos', nargs='+', choices=('velha', 'lig4'), default=['velha'])
+    parser.add_argument('--velha', nargs='+', type=dimensoes_jogo_da_velha, default=[(3, 3)], metavar='T:P')
+    parser.add_argument('--lig4', nargs='+', type=dimensoes_lig4, default=[(7, 6, 4)], metavar='CxL:P')
+    parser.add_argument('--c', nargs='+', type=float, default=[0.1])
+    parser.add_argument('--iteracoes', nargs='+', type=int, default=[1000])
+    parser.add_argument('--tempo', nargs='+', type=int, help='milissegundos por jogada; substitui --iteracoes')
+    parser.add_argument('--politica', choices=POLITICAS, help='política das simulações da IA medida')
+    parser.add_argument('--processos', type=int, default=1, help='processos da busca da IA medida')
+    parser.add_argument('--threads', type=int, default=1, help='threads da busca na árvore compartilhada da IA medida')
+    parser.add_argument(
+        '--compartilhada', action='store_true', help='os processos buscam numa árvore só em memória compartilhada'
+    )
+    parser.add_argument('--rave', type=float, help='equivalência do RAVE na IA medida')
+    parser.add_argument('--resolvedor', action='store_true', help='liga o MCTS-Solver na IA medida')
+    parser.add_argument('--parada-visitas', type=float, help='fração das iterações restantes para a parada antecipada')
+    parser.add_argument('--parada-confianca', type=float, help='confiança para a parada antecipada, como 0.99')
+    parser.add_argument('--max-nos', type=int, help='limite de nós da árvore da IA medida')
+    parser.add_argument('--sem-poda', action='store_true', help='no limite de nós, para de expandir em vez de podar')
+    parser.add_argument('--simetria', type=int, help='profundidade até onde a IA medida junta jogadas simétricas')
+    parser.add_argument('--adversario', choices=('aleatorio', 'ia'), default='aleatorio')
+    parser.add_argument('--c-adversario', type=float, default=0.1)
+    parser.add_argument('--iteracoes-adversario', type=int, default=1000)
+    parser.add_argument('--tempo-adversario', type=int, help='milissegundos por jogada do adversário')
+    parser.add_argument('--politica-adversario', choices=POLITICAS)
+    parser.add_argument('--partidas', type=int, default=10)
+    parser.add_argument('--bitboard', action='store_true')
+    parser.add_argument('--vizinhanca', type=int, help='no jogo da velha, só casas a até essa distância das peças')
+    parser.add_argument('--semente', type=int)
+    parser.add_argument('--saida', help='arquivo para o JSON; sem ele, vai para a saída padrão')
+    parser.add_argument('--perfil', help='grava o cProfile das buscas da IA medida neste arquivo')
+    return parser.parse_args()
+
+
+def main() -> None:
+    argumentos = argumentos_linha_de_comando()
+    if argumentos.semente is not None:
+        seed(argumentos.semente)
+    perfil = Profile() if argumentos.perfil is not None else None
+
+    resultados: list[dict[str, object]] = []
+    # Com --tempo o orçamento de cada jogada é de relógio e as iterações deixam de contar
+    orcamentos = (
+        [(max_iteracoes, None) for max_iteracoes in argumentos.iteracoes]
+        if argumentos.tempo is None
+        else [(argumentos.iteracoes[0], tempo) for tempo in argumentos.tempo]
+    )
+    for c in argumentos.c:
+        for max_iteracoes, tempo in orcamentos:
+            if 'velha' in argumentos.jogos:
+                for tamanho, pontos in argumentos.velha:
+                    fabrica = fabrica_jogo_da_velha(tamanho, pontos, argumentos.bitboard, argumentos.vizinhanca)
+                    resultado = {'jogo': 'velha', 'tamanho': tamanho, 'pontos_pra_ganhar': pontos}
+                    resultados.append(resultado | mede(fabrica, c, max_iteracoes, tempo, argumentos, perfil))
+            if 'lig4' in argumentos.jogos:
+                for colunas, linhas, casas in argumentos.lig4:
+                    fabrica_lig = fabrica_lig4(colunas, linhas, casas, argumentos.bitboard)
+                    resultado = {'jogo': 'lig4', 'colunas': colunas, 'linhas': linhas, 'casas_pra_ganhar': casas}
+                    resultados.append(resultado | mede(fabrica_lig, c, max_iteracoes, tempo, argumentos, perfil))
+
+    relatorio = {
+        'python': python_version(),
+        'adversario': argumentos.adversario,
+        'c_adversario': argumentos.c_adversario if argumentos.adversario == 'ia' else None,
+        'iteracoes_adversario': argumentos.iteracoes_adversario if argumentos.adversario == 'ia' else None,
+        'tempo_adversario_ms': argumentos.tempo_adversario if argumentos.adversario == 'ia' else None,
+        'processos': argumentos.processos,
+        'threads': argumentos.threads,
+        'compartilhada': argumentos.compartilhada,
+        'politica': argumentos.politica,
+        'simetria': argumentos.simetria,
+        'politica_adversario': argumentos.politica_adversario if argumentos.adversario == 'ia' else None,
+        'bitboard': argumentos.bitboard,
+        'vizinhanca': argumentos.vizinhanca,
+        'rave': argumentos.rave,
+        'resolvedor': argumentos.resolvedor,
+        'parada_visitas': argumentos.parada_visitas,
+        'parada_confianca': argumentos.parada_confianca,
+        'max_nos': argumentos.max_nos,
+        'poda': not argumentos.sem_poda,
+        'semente': argumentos.semente,
+        'resultados': resultados,
+    }
+    if perfil is not None:
+        perfil.dump_stats(argumentos.perfil)
+
+    texto = json.dumps(relatorio, indent=2, ensure_ascii=False)
+    if argumentos.saida is None:
+        print(texto)  # noqa: T201
+    else:
+        with open(argumentos.saida, 'w', encoding='utf-8') as arquivo:  # noqa: PTH123
+            arquivo.write(texto + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+from mcts.jogo import (
+    JogadaJogoDaVelha,
+    JogadaLig4,
+    Jogo,
+    Vizinhanca,
+    chaves_simetricas,
+    simetrias_colunas,
+    simetrias_quadrado,
+    tabela_zobrist,
+)
+
+
+def _tem_sequencia(pecas: int, direcoes: tuple[int, ...], tamanho_sequencia: int) -> bool:
+    for direcao in direcoes:
+        # Depois de k - 1 deslocamentos, só sobram os bits que iniciam uma sequência de k peças
+        sequencias = pecas
+        for passo in range(1, tamanho_sequencia):
+            sequencias &= pecas >> (passo * direcao)
+            if not sequencias:
+                break
+        if sequencias:
+            return True
+    return False
+
+
+def _ameacas(pecas: int, direcoes: tuple[int, ...], tamanho_sequencia: int) -> int:
+    # Casas que completariam uma sequência de k peças, estejam livres ou não: para cada direção e cada
+    # posição da casa dentro da sequência, as outras k - 1 precisam ter peças
+    if pecas.bit_count() < tamanho_sequencia - 1:
+        return 0
+
+    ameacas = 0
+    for direcao in direcoes:
+        for vazia in range(tamanho_sequencia):
+            casas = -1
+            for posicao in range(tamanho_sequencia):
+                deslocamento = (posicao - vazia) * direcao
+                if deslocamento > 0:
+                    casas &= pecas >> deslocamento
+                elif deslocamento < 0:
+                    casas &= pecas << -deslocamento
+                if not casas:
+                    break
+            ameacas |= casas
+    return ameacas
+
+
+def _menor_bit(bits: int) -> int:
+    return (bits & -bits).bit_length() - 1
+
+
+class JogoDaVelhaBitboard(Jogo[JogadaJogoDaVelha]):
+    # Cada linha ocupa tamanho + 1 bits: o bit extra fica sempre vazio e impede que uma sequência
+    # passe de uma linha para a seguinte
+    def __init__(self, tamanho: int, pontos_pra_ganhar: int, vizinhanca: int | None = None) -> None:
+        if tamanho <= 0:
+            raise Exception('O tamanho passado não é válido.')
+        if pontos_pra_ganhar <= 1 or pontos_pra_ganhar > tamanho:
+            raise Exception('A quantidade de pontos pra ganhar passada não é válida.')
+
+        self.vencedor: bool | None = None
+        self.jogador: bool = True
+        self.tamanho: int = tamanho
+        self.pontos_pra_ganhar: int = pontos_pra_ganhar
+        self.largura: int = tamanho + 1
+        self.direcoes: tuple[int, ...] = (1, self.largura - 1, self.largura, self.largura + 1)
+        self.pecas: dict[bool, int] = {True: 0, False: 0}
+        # Todas as casas do tabuleiro, sem os bits separadores
+        self.mascara: int = sum(((1 << tamanho) - 1) << (i * self.largura) for i in range(tamanho))
+        self.jogadas: set[JogadaJogoDaVelha] = {(i, j) for j in range(self.tamanho) for i in range(self.tamanho)}
+        self.zobrist: tuple[tuple[int, int], ...] = tabela_zobrist(tamanho * tamanho)
+        self.hash: int = 0
+        self.vizinhanca = Vizinhanca(tamanho, vizinhanca) if vizinhanca is not None else None
+
+    @property
+    def tabuleiro(self) -> list[list[bool | None]]:
+        return [[self._casa(i * self.largura + j) for j in range(self.tamanho)] for i in range(self.tamanho)]
+
+    def _casa(self, bit: int) -> bool | None:
+        if self.pecas[True] >> bit & 1:
+            return True
+        if self.pecas[False] >> bit & 1:
+            return False
+        return None
+
+    def lista_jogadas(self) -> set[JogadaJogoDaVelha]:
+        if not self.acabou():
+            return self.jogadas if self.vizinhanca is None else self.vizinhanca.jogadas()
+
+        raise Exception('O jogo já terminou.')
+
+    def joga(self, jogada: JogadaJogoDaVelha) -> None:
+        if jogada not in self.jogadas:
+            raise Exception('A jogada não é válida.')
+
+        x, y = jogada
+        self.jogadas.remove(jogada)
+        if self.vizinhanca is not None:
+            self.vizinhanca.joga(jogada, self.jogadas)
+        self.pecas[self.jogador] |= 1 << (x * self.largura + y)
+        self.hash ^= self.zobrist[x * self.tamanho + y][self.jogador]
+        if _tem_sequencia(self.pecas[self.jogador], self.direcoes, self.pontos_pra_ganhar):
+            self.vencedor = self.jogador
+        self.jogador = not self.jogador
+
+    def desfaz(self, jogada: JogadaJogoDaVelha) -> None:
+        x, y = jogada
+        bit = 1 << (x * self.largura + y)
+        if not self.pecas[not self.jogador] & bit:
+            raise Exception('A jogada não pode ser desfeita.')
+
+        self.jogador = not self.jogador
+        self.pecas[self.jogador] &= ~bit
+        self.hash ^= self.zobrist[x * self.tamanho + y][self.jogador]
+        self.jogadas.add(jogada)
+        if self.vizinhanca is not None:
+            self.vizinhanca.desfaz(jogada)
+        self.vencedor = None
+
+    def acabou(self) -> bool:
+        return self.vencedor is not None or not self.jogadas
+
+    def jogada_vencedora(self, jogador: bool) -> JogadaJogoDaVelha | None:
+        livres = self.mascara & ~(self.pecas[True] | self.pecas[False])
+        casas = _ameacas(self.pecas[jogador], self.direcoes, self.pontos_pra_ganhar) & livres
+        if not casas:
+            return None
+        x, y = divmod(_menor_bit(casas), self.largura)
+        return (x, y)
+
+    def chaves_simetricas(self) -> tuple[int, ...]:
+        return chaves_simetricas(self.tabuleiro, simetrias_quadrado(self.tamanho), self.zobrist)
+
+    def transforma(self, jogada: JogadaJogoDaVelha, simetria: int) -> JogadaJogoDaVelha:
+        casa = simetrias_quadrado(self.tamanho)[simetria][jogada[0] * self.tamanho + jogada[1]]
+        x, y = divmod(casa, self.tamanho)
+        return (x, y)
+
+    def ganhador(self) -> bool | None:
+        return self.vencedor
+
+    def chave(self) -> int:
+        return self.hash
+
+
+class Lig4Bitboard(Jogo[JogadaLig4]):
+    # Cada coluna ocupa linhas + 1 bits, de baixo pra cima, com um bit sempre vazio no topo
+    def __init__(self, colunas: int, linhas: int, casas_pra_ganhar: int) -> None:
+        if colunas <= 0:
+            raise ValueError('Quantidade de colunas inválida')
+        if linhas <= 0:
+            raise ValueError('Quantidade de linhas inválida')
+        if casas_pra_ganhar <= 1 or (casas_pra_ganhar > linhas and casas_pra_ganhar > colunas):
+            raise ValueError('Quantidade de casas para ganhar inválida')
+
+        self.vencedor: bool | None = None
+        self.jogador = True
+        self.colunas = colunas
+        self.linhas = linhas
+        self.casas_pra_ganhar = casas_pra_ganhar
+        self.altura_coluna = linhas + 1
+        self.direcoes: tuple[int, ...] = (1, self.altura_coluna - 1, self.altura_coluna, self.altura_coluna + 1)
+        self.pecas: dict[bool, int] = {True: 0, False: 0}
+        # A casa de baixo de cada coluna e todas as casas, sem o bit do topo
+        self.fundo: int = sum(1 << (i * self.altura_coluna) for i in range(colunas))
+        self.mascara: int = self.fundo * ((1 << linhas) - 1)
+        self.alturas: list[int] = [0 for _ in range(colunas)]
+        self.validas: set[JogadaLig4] = set(range(colunas))
+        self.jogadas = 0
+        self.zobrist: tuple[tuple[int, int], ...] = tabela_zobrist(colunas * linhas)
+        self.hash: int = 0
+
+    @property
+    def tabuleiro(self) -> list[list[bool | None]]:
+        return [[self._casa(i * self.altura_coluna + j) for j in range(self.linhas)] for i in range(self.colunas)]
+
+    def _casa(self, bit: int) -> bool | None:
+        if self.pecas[True] >> bit & 1:
+            return True
+        if self.pecas[False] >> bit & 1:
+            return False
+        return None
+
+    def lista_jogadas(self) -> set[JogadaLig4]:
+        if self.acabou():
+            raise RuntimeError('O jogo já terminou')
+
+        return self.validas
+
+    def joga(self, jogada: JogadaLig4) -> None:
+        if jogada not in self.validas:
+            raise ValueError('Jogada não é válida')
+
+        self.pecas[self.jogador] |= 1 << (jogada * self.altura_coluna + self.alturas[jogada])
+        self.hash ^= self.zobrist[jogada * self.linhas + self.alturas[jogada]][self.jogador]
+        self.alturas[jogada] += 1
+        if self.alturas[jogada] == self.linhas:
+            self.validas.remove(jogada)
+        if _tem_sequencia(self.pecas[self.jogador], self.direcoes, self.casas_pra_ganhar):
+            self.vencedor = self.jogador
+        self.jogador = not self.jogador
+        self.jogadas += 1
+
+    def desfaz(self, jogada: JogadaLig4) -> None:
+        if not 0 <= jogada < self.colunas or self.alturas[jogada] == 0:
+            raise ValueError('Jogada não pode ser desfeita')
+
+        self.alturas[jogada] -= 1
+        self.validas.add(jogada)
+        self.jogador = not self.jogador
+        self.pecas[self.jogador] &= ~(1 << (jogada * self.altura_coluna + self.alturas[jogada]))
+        self.hash ^= self.zobrist[jogada * self.linhas + self.alturas[jogada]][self.jogador]
+        self.vencedor = None
+        self.jogadas -= 1
+
+    def acabou(self) -> bool:
+        return self.vencedor is not None or self.jogadas == self.colunas * self.linhas
+
+    def jogada_vencedora(self, jogador: bool) -> JogadaLig4 | None:
+        # Somar o fundo às casas ocupadas leva o vai-um até a primeira casa livre de cada coluna
+        jogaveis = ((self.pecas[True] | self.pecas[False]) + self.fundo) & self.mascara
+        casas = _ameacas(self.pecas[jogador], self.direcoes, self.casas_pra_ganhar) & jogaveis
+        if not casas:
+            return None
+        return _menor_bit(casas) // self.altura_coluna
+
+    def chaves_simetricas(self) -> tuple[int, ...]:
+        return chaves_simetricas(self.tabuleiro, simetrias_colunas(self.colunas, self.linhas), self.zobrist)
+
+    def transforma(self, jogada: JogadaLig4, simetria: int) -> JogadaLig4:
+        return jogada if simetria == 0 else self.colunas - 1 - jogada
+
+    def ganhador(self) -> bool | None:
+        return self.vencedor
+
+    def chave(self) -> int:
+        return self.hash
@@ -0,0 +1,191 @@
+import json
+import socket
+import subprocess
+import sys
+from argparse import ArgumentParser, Namespace
+from concurrent.futures import Future
+from itertools import count
+from random import Random
+from statistics import quantiles
+from threading import Lock, Thread
+from time import perf_counter
+from typing import IO, TYPE_CHECKING, Any
+
+from mcts.bitboard import JogoDaVelhaBitboard, Lig4Bitboard
+from mcts.jogo import Jogo
+from mcts.servidor import Mensagem, codifica
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+
+class Cliente:
+    # Uma conexão com o servidor, compartilhada pelos jogadores; as respostas chegam fora de ordem e
+    # são entregues pelo id
+    def __init__(self, entrada: IO[str], saida: IO[str]) -> None:
+        self.entrada = entrada
+        self.saida = saida
+        self.trava = Lock()
+        self.ids = count()
+        self.esperando: dict[int, Future[Mensagem]] = {}
+        self.leitor = Thread(target=self.le, daemon=True)
+        self.leitor.start()
+
+    def le(self) -> None:
+        for linha in self.entrada:
+            resposta = json.loads(linha)
+            with self.trava:
+                futuro = self.esperando.pop(resposta['id'])
+            futuro.set_result(resposta)
+
+    def pede(self, pedido: Mensagem) -> Mensagem:
+        futuro: Future[Mensagem] = Future()
+        with self.trava:
+            identificador = next(self.ids)
+            self.esperando[identificador] = futuro
+            self.saida.write(json.dumps(pedido | {'id': identificador}) + '\n')
+            self.saida.flush()
+        return futuro.result()
+
+
+def novo_jogo(argumentos: Namespace) -> Jogo[Any]:
+    if argumentos.jogo == 'velha':
+        return JogoDaVelhaBitboard(argumentos.tamanho, argumentos.pontos, argumentos.vizinhanca)
+    return Lig4Bitboard(argumentos.colunas, argumentos.linhas, argumentos.casas)
+
+
+def descricao(argumentos: Namespace) -> Mensagem:
+    if argumentos.jogo == 'velha':
+        return {
+            'jogo': 'velha',
+            'tamanho': argumentos.tamanho,
+            'pontos': argumentos.pontos,
+            'vizinhanca': argumentos.vizinhanca,
+        }
+    return {'jogo': 'lig4', 'colunas': argumentos.colunas, 'linhas': argumentos.linhas, 'casas': argumentos.casas}
+
+
+class Medidas:
+    def __init__(self) -> None:
+        self.trava = Lock()
+        self.latencias: list[float] = []
+        self.erros = 0
+        self.visitas = 0
+        self.visitas_reaproveitadas = 0
+
+    def registra(self, latencia: float, resposta: Mensagem) -> None:
+        with self.trava:
+            self.latencias.append(latencia)
+            if 'erro' in resposta:
+                self.erros += 1
+                return
+            self.visitas += resposta['visitas']
+            self.visitas_reaproveitadas += resposta['visitas_reaproveitadas']
+
+
+def joga(cliente: Cliente, argumentos: Namespace, jogador: int, medidas: Medidas, pedidos: 'Iterator[int]') -> None:
+    # Cada jogador joga partidas contra o servidor: o servidor escolhe as jogadas de um lado e o jogador
+    # responde ao acaso, sempre com o mesmo id de partida para o servidor reaproveitar a árvore
+    gerador = Random(f'{argumentos.semente}:{jogador}')
+    base = descricao(argumentos) | {'iteracoes': argumentos.iteracoes, 'prazo_ms': argumentos.prazo}
+    for partida in count():
+        jogo = novo_jogo(argumentos)
+        jogadas: list[object] = []
+        while not jogo.acabou():
+            if next(pedidos) >= argumentos.pedidos:
+                return
+            inicio = perf_counter()
+            resposta = cliente.pede(base | {'partida': f'{jogador}:{partida}', 'jogadas': jogadas})
+            medidas.registra(perf_counter() - inicio, resposta)
+            if 'erro' in resposta:
+                break
+            jogada = resposta['jogada']
+            jogo.joga(tuple(jogada) if isinstance(jogada, list) else jogada)
+            jogadas.append(jogada)
+            if jogo.acabou():
+                break
+            resposta_aleatoria = gerador.choice(list(jogo.lista_jogadas()))
+            jogo.joga(resposta_aleatoria)
+            jogadas.append(codifica(resposta_aleatoria))
+
+
+def conecta(argumentos: Namespace) -> tuple[Cliente, subprocess.Popen[str] | None]:
+    if argumentos.porta is not None or argumentos.socket is not None:
+        if argumentos.porta is not None:
+            conexao = socket.create_connection(('127.0.0.1', argumentos.porta))
+        else:
+            conexao = socket.socket(socket.AF_UNIX)
+            conexao.connect(argumentos.socket)
+        entrada = conexao.makefile('r', encoding='utf-8')
+        saida = conexao.makefile('w', encoding='utf-8')
+        return Cliente(entrada, saida), None
+
+    # Sem endereço, sobe um servidor próprio falando pela entrada e saída padrão
+    comando = [sys.executable, '-m', 'mcts.servidor', '--processos', str(argumentos.processos)]
+    servidor = subprocess.Popen(comando, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, encoding='utf-8')  # noqa: S603
+    if servidor.stdin is None or servidor.stdout is None:
+        raise RuntimeError('Não foi possível falar com o servidor')
+    return Cliente(servidor.stdout, servidor.stdin), servidor
+
+
+def argumentos_linha_de_comando() -> Namespace:
+    parser = ArgumentParser(description='Gerador de carga para o servidor de análise.')
+    parser.add_argument('--porta', type=int, help='servidor já rodando em 127.0.0.1 nessa porta')
+    parser.add_argument('--socket', help='servidor já rodando nesse socket unix')
+    parser.add_argument('--processos', type=int, default=1, help='processos do servidor criado pelo gerador')
+    parser.add_argument('--clientes', type=int, default=4, help='partidas jogadas ao mesmo tempo')
+    parser.add_argument('--pedidos', type=int, default=200)
+    parser.add_argument('--iteracoes', type=int, default=1000)
+    parser.add_argument('--prazo', type=int, help='prazo de cada pedido em milissegundos')
+    parser.add_argument('--jogo', choices=('velha', 'lig4'), default='velha')
+    parser.add_argument('--tamanho', type=int, default=3)
+    parser.add_argument('--pontos', type=int, default=3)
+    parser.add_argument('--vizinhanca', type=int)
+    parser.add_argument('--colunas', type=int, default=7)
+    parser.add_argument('--linhas', type=int, default=6)
+    parser.add_argument('--casas', type=int, default=4)
+    parser.add_argument('--semente', type=int, default=0)
+    return parser.parse_args()
+
+
+def main() -> None:
+    argumentos = argumentos_linha_de_comando()
+    cliente, servidor = conecta(argumentos)
+    medidas = Medidas()
+    pedidos = count()
+
+    inicio = perf_counter()
+    jogadores = [
+        Thread(target=joga, args=(cliente, argumentos, jogador, medidas, pedidos))
+        for jogador in range(argumentos.clientes)
+    ]
+    for jogador in jogadores:
+        jogador.start()
+    for jogador in jogadores:
+        jogador.join()
+    tempo = perf_counter() - inicio
+
+    cliente.saida.close()
+    if servidor is not None:
+        servidor.wait()
+
+    latencias = sorted(medidas.latencias)
+    percentis = quantiles(latencias, n=100, method='inclusive') if len(latencias) > 1 else latencias * 99
+    resultado = {
+        'pedidos': len(latencias),
+        'erros': medidas.erros,
+        'pedidos_por_segundo': len(latencias) / tempo if tempo else 0.0,
+        'latencia_ms': {
+            'p50': percentis[49] * 1000,
+            'p95': percentis[94] * 1000,
+            'p99': percentis[98] * 1000,
+            'max': latencias[-1] * 1000 if latencias else 0.0,
+        },
+        # Fração das visitas da raiz que vieram de buscas anteriores da mesma partida
+        'reaproveitamento': medidas.visitas_reaproveitadas / medidas.visitas if medidas.visitas else 0.0,
+    }
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))  # noqa: T201
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,292 @@
+from concurrent.futures import FIRST_EXCEPTION, Future, ProcessPoolExecutor, wait
+from math import sqrt
+from multiprocessing import Event, Lock
+from multiprocessing.shared_memory import SharedMemory
+from random import choice, randrange, seed
+from typing import TYPE_CHECKING
+from weakref import finalize
+
+from mcts.ia import IA, No
+
+if TYPE_CHECKING:
+    from multiprocessing.synchronize import Event as TipoEvent
+    from multiprocessing.synchronize import Lock as TipoLock
+
+    from mcts.jogo import Jogo
+    from mcts.politica import Politica
+
+SEM_NO = -1
+# Nós que cabem no bloco quando a IA não define max_nos: 28 bytes cada, uns 28 MB no total
+CAPACIDADE = 2**20
+
+
+def ordena[Jogada](jogadas: set[Jogada]) -> list[Jogada]:
+    # A mesma ordem em todos os processos, para a posição de um filho no bloco dizer qual é a jogada dele
+    return sorted(jogadas, key=repr)
+
+
+class ArvoreCompartilhada:
+    # Os vetores da ArvoreCompacta num bloco de memória compartilhada, para vários processos buscarem na mesma
+    # árvore cada um com o seu GIL. Como o bloco não cresce, um nó é expandido de uma vez só: seus filhos ficam
+    # juntos, na ordem de ordena, e a jogada de um filho é a sua posição entre os irmãos. O começo do bloco
+    # guarda quantos nós estão em uso
+    def __init__(self, capacidade: int, nome: str | None = None) -> None:
+        self.capacidade = capacidade
+        # O bloco fica fora do resource_tracker, que não sobe dentro do textual (o stderr de lá não tem fileno);
+        # quem o criou o apaga em BuscaCompartilhada.encerra ou ao sair
+        if nome is None:
+            self.memoria = SharedMemory(create=True, size=8 + capacidade * 28, track=False)
+        else:
+            self.memoria = SharedMemory(nome, track=False)
+
+        buffer = self.memoria.buf
+        if buffer is None:
+            raise RuntimeError('Bloco de memória compartilhada fechado')
+        self.usados = buffer[:8].cast('q')
+        self.somas = buffer[8 : 8 + capacidade * 8].cast('d')
+        inicio = 8 + capacidade * 8
+        self.visitas, self.perdas_virtuais, self.pais, self.primeiros_filhos, self.quantidade_filhos = (
+            buffer[inicio + i * capacidade * 4 : inicio + (i + 1) * capacidade * 4].cast('i') for i in range(5)
+        )
+        if nome is None:
+            self.limpa()
+
+    @property
+    def nome(self) -> str:
+        return self.memoria.name
+
+    def __len__(self) -> int:
+        return self.usados[0]
+
+    def limpa(self) -> None:
+        self.usados[0] = 0
+        self.novos_nos(SEM_NO, 1)
+
+    def novos_nos(self, pai: int, quantidade: int) -> int:
+        # Devolve o primeiro dos nós novos, ou SEM_NO se não couberem no bloco
+        primeiro = self.usados[0]
+        if primeiro + quantidade > self.capacidade:
+            return SEM_NO
+
+        for no in range(primeiro, primeiro + quantidade):
+            self.somas[no] = 0.0
+            self.visitas[no] = 0
+            self.perdas_virtuais[no] = 0
+            self.pais[no] = pai
+            self.primeiros_filhos[no] = SEM_NO
+            self.quantidade_filhos[no] = 0
+        self.usados[0] = primeiro + quantidade
+        return primeiro
+
+    def expande(self, no: int, quantidade: int) -> bool:
+        primeiro = self.novos_nos(no, quantidade)
+        if primeiro == SEM_NO:
+            return False
+
+        self.primeiros_filhos[no] = primeiro
+        self.quantidade_filhos[no] = quantidade
+        return True
+
+    def fecha(self) -> None:
+        # As visões do bloco precisam ser soltas antes, senão o close reclama
+        for vetor in (
+            self.usados,
+            self.somas,
+            self.visitas,
+            self.perdas_virtuais,
+            self.pais,
+            self.primeiros_filhos,
+            self.quantidade_filhos,
+        ):
+            vetor.release()
+        self.memoria.close()
+
+    def apaga(self) -> None:
+        self.fecha()
+        self.memoria.unlink()
+
+
+class _Processo:
+    # O que cada processo recebe uma vez, ao ser criado: travas e eventos só passam assim para outro processo
+    arvore: ArvoreCompartilhada | None = None
+    trava: 'TipoLock | None' = None
+    parar: 'TipoEvent | None' = None
+
+
+_processo = _Processo()
+
+
+def _inicia_processo(nome: str, capacidade: int, trava: 'TipoLock', parar: 'TipoEvent') -> None:
+    _processo.arvore = ArvoreCompartilhada(capacidade, nome)
+    _processo.trava = trava
+    _processo.parar = parar
+
+
+class BuscaCompartilhada[Jogada]:
+    # Paralelismo na árvore entre processos: como as threads de IA.busca_compartilhada, os processos percorrem
+    # a mesma árvore com perda virtual nos caminhos que ainda estão simulando, e a seleção, a expansão e a
+    # retropropagação ficam atrás de uma trava. As simulações, que são quase todo o trabalho, rodam em paralelo
+    def __init__(self, processos: int, capacidade: int) -> None:
+        self.arvore = ArvoreCompartilhada(capacidade)
+        self.apaga = finalize(self, self.arvore.apaga)
+        self.trava = Lock()
+        self.parar = Event()
+        self.executor = ProcessPoolExecutor(
+            processos, initializer=_inicia_processo, initargs=(self.arvore.nome, capacidade, self.trava, self.parar)
+        )
+        self.processos = processos
+        self.jogadas: list[Jogada] = []
+        self.futuros: list[Future[int]] = []
+
+    def inicia(
+        self,
+        jogo: 'Jogo[Jogada]',
+        c: float,
+        max_iteracoes: int | None,
+        politica: 'Politica[Jogada] | None',
+        lote: int,
+    ) -> None:
+        # Sem max_iteracoes, os processos buscam até para
+        self.arvore.limpa()
+        self.parar.clear()
+        self.jogadas = ordena(jogo.lista_jogadas())
+        cotas: list[int | None] = (
+            [None] * self.processos
+            if max_iteracoes is None
+            else [
+                max_iteracoes // self.processos + (1 if i < max_iteracoes % self.processos else 0)
+                for i in range(self.processos)
+            ]
+        )
+        self.futuros = [
+            self.executor.submit(_busca, c, cota, politica, lote, jogo, randrange(2**32)) for cota in cotas
+        ]
+
+    def espera(self, tempo: float) -> bool:
+        # Verdadeiro quando todos os processos terminaram; um erro num deles aparece aqui
+        feitos, pendentes = wait(self.futuros, tempo, FIRST_EXCEPTION)
+        for futuro in feitos:
+            futuro.result()
+        return not pendentes
+
+    def para(self) -> None:
+        self.parar.set()
+
+    def raiz(self) -> No[Jogada]:
+        # Cópia da raiz e dos seus filhos como nós comuns, para o resto da IA escolher e mostrar a jogada
+        arvore = self.arvore
+        raiz = No[Jogada]()
+        with self.trava:
+            raiz.junta(arvore.visitas[0], arvore.somas[0] / arvore.visitas[0] if arvore.visitas[0] else 0.0)
+            primeiro = arvore.primeiros_filhos[0]
+            for posicao in range(arvore.quantidade_filhos[0]):
+                filho = primeiro + posicao
+                raiz.adiciona_filho(self.jogadas[posicao])
+                if arvore.visitas[filho]:
+                    raiz.filhos[self.jogadas[posicao]].junta(
+                        arvore.visitas[filho], arvore.somas[filho] / arvore.visitas[filho]
+                    )
+        return raiz
+
+    def encerra(self) -> None:
+        self.parar.set()
+        self.executor.shutdown(cancel_futures=True)
+        self.apaga()
+
+
+def _busca[Jogada](  # noqa: PLR0913
+    c: float,
+    cota: int | None,
+    politica: 'Politica[Jogada] | None',
+    lote: int,
+    jogo: 'Jogo[Jogada]',
+    semente: int,
+) -> int:
+    seed(semente)
+    arvore, trava, parar = _processo.arvore, _processo.trava, _processo.parar
+    if arvore is None or trava is None or parar is None:
+        raise RuntimeError('Processo sem a árvore compartilhada')
+
+    # A IA local só faz as simulações, com a política e o lote da IA que pediu a busca
+    ia = IA[Jogada](c, 0, politica=politica, lote=lote)
+    # As jogadas de cada nó já visitado por este processo, na ordem dos filhos no bloco
+    jogadas: dict[int, list[Jogada]] = {}
+    iteracoes = 0
+    while (cota is None or iteracoes < cota) and not parar.is_set():
+        historico: list[Jogada] = []
+        no = selecao(arvore, trava, jogo, historico, jogadas, c)
+
+        resultado, visitas = ia.simula(jogo, historico)
+
+        with trava:
+            retropropagacao(arvore, no, resultado, visitas)
+
+        for jogada in reversed(historico):
+            jogo.desfaz(jogada)
+        iteracoes += 1
+
+    return iteracoes
+
+
+def selecao[Jogada](  # noqa: PLR0913
+    arvore: ArvoreCompartilhada,
+    trava: 'TipoLock',
+    jogo: 'Jogo[Jogada]',
+    historico: list[Jogada],
+    jogadas: dict[int, list[Jogada]],
+    c: float,
+) -> int:
+    # Desce pela UCT até um nó que ainda não terminou uma simulação. Só a escolha de cada filho fica atrás da
+    # trava; listar e fazer as jogadas, que custam mais, ficam fora. As visitas do nó atual são lidas sem a
+    # trava: um valor velho só faz duas simulações partirem do mesmo nó
+    no = 0
+    while not jogo.acabou() and (no == 0 or arvore.visitas[no]):
+        if no not in jogadas:
+            jogadas[no] = ordena(jogo.lista_jogadas())
+        with trava:
+            filho = escolhe_filho(arvore, no, len(jogadas[no]), c)
+            if filho == SEM_NO:
+                break
+            # Perda virtual: conta o filho como uma derrota ainda não simulada para afastar os outros processos
+            arvore.perdas_virtuais[filho] += 1
+
+        jogada = jogadas[no][filho - arvore.primeiros_filhos[no]]
+        jogo.joga(jogada)
+        historico.append(jogada)
+        no = filho
+
+    return no
+
+
+def escolhe_filho(arvore: ArvoreCompartilhada, no: int, quantidade: int, c: float) -> int:
+    # Expande o nó na primeira passagem por ele; com o bloco cheio devolve SEM_NO e a simulação parte do próprio nó
+    if not arvore.quantidade_filhos[no] and not arvore.expande(no, quantidade):
+        return SEM_NO
+
+    primeiro = arvore.primeiros_filhos[no]
+    novos = []
+    melhor_filho = SEM_NO
+    maior_intervalo = -1.0
+    for filho in range(primeiro, primeiro + quantidade):
+        visitas = arvore.visitas[filho] + arvore.perdas_virtuais[filho]
+        if not visitas:
+            novos.append(filho)
+            continue
+        intervalo = arvore.somas[filho] / visitas + c * sqrt(arvore.visitas[no] / visitas)
+        if intervalo > maior_intervalo:
+            maior_intervalo = intervalo
+            melhor_filho = filho
+
+    return choice(novos) if novos else melhor_filho
+
+
+def retropropagacao(arvore: ArvoreCompartilhada, no: int, resultado: float, visitas: int) -> None:
+    # Também tira a perda virtual que a seleção pôs em cada nó do caminho, menos na raiz
+    while no != SEM_NO:
+        arvore.visitas[no] += visitas
+        arvore.somas[no] += resultado * visitas
+        pai = arvore.pais[no]
+        if pai != SEM_NO:
+            arvore.perdas_virtuais[no] -= 1
+        no = pai
+        resultado = 1.0 - resultado
@@ -0,0 +1,102 @@
+from collections import Counter
+
+FASES = ('copia', 'selecao', 'expansao', 'simulacao', 'retropropagacao', 'desfaz')
+
+
+class Estatisticas:
+    # Números de uma chamada a IA.escolhe_jogada; os tempos ficam em nanossegundos. Nas buscas em
+    # paralelo só o tempo total e as visitas da raiz são medidos
+    def __init__(self) -> None:
+        self.tempos = dict.fromkeys(FASES, 0)
+        self.tempo_total = 0
+        self.iteracoes = 0
+        self.tamanhos_simulacao: Counter[int] = Counter()
+        self.profundidade_maxima = 0
+        self.soma_profundidades = 0
+        self.nos_alocados = 0
+        self.expansoes = 0
+        self.soma_ramificacoes = 0
+        # Iterações da cota que a parada antecipada deixou de fazer
+        self.iteracoes_poupadas = 0
+        # Só é medida quando a busca roda dentro de uma sessão do tracemalloc
+        self.memoria_pico: int | None = None
+
+    def registra(
+        self, profundidade: int, tamanho_simulacao: int | None, ramificacao: int | None, alocou: bool
+    ) -> None:
+        self.iteracoes += 1
+        self.soma_profundidades += profundidade
+        self.profundidade_maxima = max(self.profundidade_maxima, profundidade)
+        if tamanho_simulacao is not None:
+            self.tamanhos_simulacao[tamanho_simulacao] += 1
+        if ramificacao is not None:
+            self.expansoes += 1
+            self.soma_ramificacoes += ramificacao
+        if alocou:
+            self.nos_alocados += 1
+
+    def acumula(self, outra: 'Estatisticas') -> None:
+        for fase in FASES:
+            self.tempos[fase] += outra.tempos[fase]
+        self.tempo_total += outra.tempo_total
+        self.iteracoes += outra.iteracoes
+        self.tamanhos_simulacao.update(outra.tamanhos_simulacao)
+        self.profundidade_maxima = max(self.profundidade_maxima, outra.profundidade_maxima)
+        self.soma_profundidades += outra.soma_profundidades
+        self.nos_alocados += outra.nos_alocados
+        self.expansoes += outra.expansoes
+        self.soma_ramificacoes += outra.soma_ramificacoes
+        self.iteracoes_poupadas += outra.iteracoes_poupadas
+        if outra.memoria_pico is not None:
+            self.memoria_pico = max(self.memoria_pico or 0, outra.memoria_pico)
+
+    @property
+    def profundidade_media(self) -> float:
+        return self.soma_profundidades / self.iteracoes if self.iteracoes else 0.0
+
+    @property
+    def ramificacao_media(self) -> float:
+        return self.soma_ramificacoes / self.expansoes if self.expansoes else 0.0
+
+    @property
+    def iteracoes_por_segundo(self) -> float:
+        return self.iteracoes / (self.tempo_total / 1e9) if self.tempo_total else 0.0
+
+    def ns_por_iteracao(self) -> dict[str, float]:
+        if not self.iteracoes:
+            return dict.fromkeys(FASES, 0.0)
+        return {fase: tempo / self.iteracoes for fase, tempo in self.tempos.items()}
+
+    def como_dict(self) -> dict[str, object]:
+        return {
+            'iteracoes': self.iteracoes,
+            'tempo_total_ns': self.tempo_total,
+            'iteracoes_por_segundo': self.iteracoes_por_segundo,
+            'tempos_ns': dict(self.tempos),
+            'ns_por_iteracao': self.ns_por_iteracao(),
+            'tamanhos_simulacao': dict(sorted(self.tamanhos_simulacao.items())),
+            'profundidade_maxima': self.profundidade_maxima,
+            'profundidade_media': self.profundidade_media,
+            'nos_alocados': self.nos_alocados,
+            'ramificacao_media': self.ramificacao_media,
+            'iteracoes_poupadas': self.iteracoes_poupadas,
+            'memoria_pico_bytes': self.memoria_pico,
+        }
+
+    def resumo(self) -> str:
+        ms = {fase: tempo / 1e6 for fase, tempo in self.tempos.items()}
+        linhas = [
+            f'{self.iteracoes} iterações em {self.tempo_total / 1e6:.1f} ms ({self.iteracoes_por_segundo:.0f}/s)',
+            ' '.join(f'{fase} {tempo:.1f} ms' for fase, tempo in ms.items()),
+            f'Profundidade média {self.profundidade_media:.1f}, máxima {self.profundidade_maxima}',
+            f'Nós alocados {self.nos_alocados}, ramificação média {self.ramificacao_media:.1f}',
+        ]
+        if self.tamanhos_simulacao:
+            total = self.tamanhos_simulacao.total()
+            media = sum(tamanho * vezes for tamanho, vezes in self.tamanhos_simulacao.items()) / total
+            linhas.append(f'Simulação média {media:.1f} jogadas, máxima {max(self.tamanhos_simulacao)}')
+        if self.iteracoes_poupadas:
+            linhas.append(f'Parada antecipada poupou {self.iteracoes_poupadas} iterações')
+        if self.memoria_pico is not None:
+            linhas.append(f'Pico de memória {self.memoria_pico / 1024:.0f} KiB')
+        return '\n'.join(linhas)
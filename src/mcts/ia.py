@@ -1,14 +1,46 @@
 from copy import deepcopy
 from math import sqrt
-from random import choice
+from random import choice, randrange, seed
+from threading import Event, Lock, Thread
+from time import perf_counter, perf_counter_ns
+from typing import TYPE_CHECKING
 
+from mcts.estatisticas import Estatisticas
 from mcts.jogo import Jogo
+from mcts.transposicao import TabelaTransposicao
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+    from concurrent.futures import ProcessPoolExecutor
+    from cProfile import Profile
+
+    from mcts.compartilhada import BuscaCompartilhada
+    from mcts.livro import LivroAberturas
+    from mcts.politica import Politica
+
+INTERVALO_PROGRESSO = 0.1
+# A cada quantas iterações a busca confere se já pode parar antes da hora
+INTERVALO_PARADA = 100
+# Fração do limite de nós que sobra depois de uma poda
+FRACAO_PODA = 0.75
 
 
 class No[Jogada]:
+    # Guardados só nos nós perto da raiz na busca com simetrias: as simetrias que deixam a posição igual e,
+    # se houver alguma, uma jogada de cada grupo de jogadas simétricas
+    simetrias: tuple[int, ...] | None = None
+    distintas: 'set[Jogada] | None' = None
+
     def __init__(self) -> None:
         self.pontuacao: float = 0.0
         self.visitas: int = 0
+        self.perdas_virtuais: int = 0
+        # Estatísticas all-moves-as-first do modo RAVE
+        self.pontuacao_rave: float = 0.0
+        self.visitas_rave: int = 0
+        # Valor provado pelo resolvedor, do ponto de vista de quem jogou para chegar aqui: 1 vitória,
+        # 0.5 empate e 0 derrota
+        self.resolvido: float | None = None
 
         self.pai: No[Jogada] | None = None
         self.filhos: dict[Jogada, No[Jogada]] = {}
@@ -23,22 +55,198 @@ class No[Jogada]:
         self.pontuacao = (self.pontuacao * self.visitas + resultado) / (self.visitas + 1)
         self.visitas += 1
 
+    def adiciona_rave(self, resultado: float) -> None:
+        self.pontuacao_rave = (self.pontuacao_rave * self.visitas_rave + resultado) / (self.visitas_rave + 1)
+        self.visitas_rave += 1
+
+    def junta(self, visitas: int, pontuacao: float) -> None:
+        if visitas == 0:
+            return
+
+        self.pontuacao = (self.pontuacao * self.visitas + pontuacao * visitas) / (self.visitas + visitas)
+        self.visitas += visitas
+
+
+def quantil_normal(probabilidade: float) -> float:
+    from statistics import NormalDist  # noqa: PLC0415 só a parada por confiança usa
+
+    return NormalDist().inv_cdf(probabilidade)
+
+
+def margem[Jogada](no: No[Jogada], z: float) -> float:
+    # Média do nó deslocada por z desvios padrão
+    return no.pontuacao + z * sqrt(max(no.pontuacao * (1 - no.pontuacao), 0.0) / no.visitas)
+
 
 class IA[Jogada]:
-    def __init__(self, c: float, max_iteracoes: int) -> None:
+    def __init__(  # noqa: C901, PLR0913, PLR0915
+        self,
+        c: float,
+        max_iteracoes: int,
+        processos: int = 1,
+        threads: int = 1,
+        tempo_limite: int | None = None,
+        transposicoes: int | None = None,
+        lote: int = 1,
+        compartilhada: bool = False,
+        coleta_estatisticas: bool = False,
+        livro: 'LivroAberturas | None' = None,
+        rave: float | None = None,
+        resolvedor: bool = False,
+        parada_visitas: float | None = None,
+        parada_confianca: float | None = None,
+        max_nos: int | None = None,
+        poda: bool = True,
+        politica: 'Politica[Jogada] | None' = None,
+        simetria: int | None = None,
+    ) -> None:
+        if transposicoes is not None and threads > 1:
+            raise ValueError('A tabela de transposição não funciona com a busca em threads')
+        if simetria is not None and (processos > 1 or transposicoes is not None):
+            raise ValueError('As simetrias não funcionam com a busca em processos nem com a tabela de transposição')
+        if politica is not None and lote > 1:
+            raise ValueError('A simulação em lote só sorteia jogadas, sem política')
+        if rave is not None and (transposicoes is not None or lote > 1):
+            raise ValueError('O RAVE não funciona com a tabela de transposição nem com a simulação em lote')
+        if resolvedor and (processos > 1 or threads > 1):
+            raise ValueError('O resolvedor só funciona na busca sem paralelismo')
+        if (parada_visitas is not None or parada_confianca is not None) and (processos > 1 or threads > 1):
+            raise ValueError('A parada antecipada só funciona na busca sem paralelismo')
+        if compartilhada and (processos < 2 or threads > 1 or rave is not None or transposicoes is not None):  # noqa: PLR2004
+            raise ValueError('A árvore compartilhada é da busca em processos, sem threads, RAVE nem transposições')
+        if max_nos is not None and ((processos > 1 and not compartilhada) or threads > 1 or transposicoes is not None):
+            raise ValueError('O limite de nós só funciona na busca sem paralelismo e sem tabela de transposição')
+        if max_nos is not None and max_nos < 2:  # noqa: PLR2004
+            raise ValueError('O limite de nós precisa deixar a raiz ter filhos')
+
         self.c = c
         self.max_iteracoes = max_iteracoes
+        self.processos = processos
+        self.threads = threads
+        # Em milissegundos; quando definido substitui max_iteracoes
+        self.tempo_limite = tempo_limite
         self.arvore = No[Jogada]()
+        # Com a tabela de transposição a árvore vira um grafo: um nó pode ser filho de vários nós
+        self.transposicoes = TabelaTransposicao[Jogada](transposicoes) if transposicoes is not None else None
+        # Quantas simulações cada folha recebe de uma vez, com o motor vetorizado em mcts.lote
+        self.lote = lote
+        self.simula_lote: Callable[[object, int], float] | None = None
+        if lote > 1:
+            from mcts.lote import simula_lote  # noqa: PLC0415 numpy é opcional
+
+            self.simula_lote = simula_lote
+        self.executor: ProcessPoolExecutor | None = None
+        # Com processos, em vez de cada um buscar numa árvore própria, todos buscam numa árvore só em memória
+        # compartilhada; max_nos passa a ser o tamanho dela
+        self.compartilhada = compartilhada
+        self.busca_processos: BuscaCompartilhada[Jogada] | None = None
+        self.ponderacao: Thread | None = None
+        self.parar_ponderacao = Event()
+        # Permite interromper a busca de outra thread, ficando com a melhor jogada até então
+        self.parar = Event()
+        self.ao_progredir: Callable[[], None] | None = None
+        self.proximo_progresso = 0.0
+        # Desligada, a coleta não custa nada: a busca só escolhe outro laço quando ela está ligada
+        self.coleta_estatisticas = coleta_estatisticas
+        self.estatisticas: Estatisticas | None = None
+        # Quando definido, fica ativo só durante a busca de escolhe_jogada
+        self.perfil: Profile | None = None
+        self.livro = livro
+        # Equivalência do RAVE: com esse tanto de visitas num filho, as estatísticas AMAF e as do próprio filho
+        # pesam mais ou menos o mesmo na seleção
+        self.rave = rave
+        # MCTS-Solver: marca posições com resultado provado e não gasta mais simulações nelas
+        self.resolvedor = resolvedor
+        # Parada antecipada: pela vantagem em visitas do filho mais visitado sobre o segundo, em fração das
+        # iterações que ainda restam, e pela confiança de que a média do filho mais visitado é maior que a de
+        # todos os outros. Com ela a jogada escolhida é a mais visitada, então com parada_visitas 1 e max_iteracoes
+        # as iterações que faltam não mudariam a escolha; abaixo de 1, no modo por tempo, que estima as iterações
+        # restantes, e pela confiança, a parada pode sair numa jogada diferente da busca inteira
+        self.parada_visitas = parada_visitas
+        self.z_parada = quantil_normal((1 + parada_confianca) / 2) if parada_confianca is not None else None
+        # Com o RAVE e com a parada antecipada a jogada escolhida é a do filho mais visitado, não a de maior média
+        self.escolhe_por_visitas = rave is not None or parada_visitas is not None or parada_confianca is not None
+        self.iteracoes_poupadas = 0
+        self.inicio_busca = 0.0
+        # Limite de nós da árvore, contando a raiz. Ao chegar nele a busca poda as subárvores menos visitadas,
+        # ou, sem poda, para de expandir e simula a partir das folhas que já existem. A contagem só é mantida
+        # com o limite definido
+        self.max_nos = max_nos
+        self.poda = poda
+        self.quantidade_nos = 1
+        self.nos_podados = 0
+        # Escolhe as jogadas das simulações; sem ela, são sorteadas entre todas as válidas
+        self.politica = politica
+        # Até essa profundidade a partir da raiz, jogadas que levam a posições simétricas viram um filho só
+        self.simetria = simetria
+        self.transforma: Callable[[Jogada, int], Jogada] | None = None
 
     def escolhe_jogada(self, jogo: Jogo[Jogada]) -> Jogada:
-        for _ in range(self.max_iteracoes):
-            no_atual: No[Jogada] = self.arvore
-            jogo_atual: Jogo[Jogada] = deepcopy(jogo)
+        # parar não é limpo aqui: quem o usa limpa antes de começar, para um pedido de parada feito antes desta
+        # linha não se perder
+        self.para_ponderacao()
 
-            no_atual = self.selecao(no_atual, jogo_atual)
-            no_atual = self.expansao(no_atual, jogo_atual)
-            resultado = self.simulacao(jogo_atual)
-            self.retropropagacao(no_atual, resultado)
+        # Uma posição do livro de aberturas é respondida sem busca
+        jogada_escolhida = self.livro.busca(jogo) if self.livro is not None else None
+        if jogada_escolhida is not None:
+            self.estatisticas = None
+            return jogada_escolhida
+
+        # Com a raiz já resolvida numa busca anterior não há o que buscar
+        if self.arvore.resolvido is None:
+            if self.simetria is not None:
+                self.transforma = jogo.transforma
+            self.pesquisa(jogo)
+        else:
+            self.estatisticas = None
+
+        jogada_escolhida = self.melhor_jogada()
+        if jogada_escolhida is None:
+            # Parada antes da primeira iteração, a busca não tem o que escolher e vale qualquer jogada legal
+            if jogo.acabou():
+                raise RuntimeError('Sem jogada disponível')
+            jogada_escolhida = choice(list(jogo.lista_jogadas()))
+
+        return jogada_escolhida
+
+    def pesquisa(self, jogo: Jogo[Jogada]) -> None:
+        estatisticas = Estatisticas() if self.coleta_estatisticas else None
+        visitas = self.arvore.visitas
+        if estatisticas is not None:
+            import tracemalloc  # noqa: PLC0415 só a coleta de estatísticas usa
+
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+        inicio = perf_counter_ns()
+        if self.perfil is not None:
+            self.perfil.enable()
+        try:
+            if self.processos > 1:
+                self.busca_paralela(jogo)
+            elif self.threads > 1:
+                self.busca_compartilhada(jogo)
+            else:
+                self.busca(jogo, estatisticas)
+        finally:
+            if self.perfil is not None:
+                self.perfil.disable()
+
+        if estatisticas is not None:
+            estatisticas.tempo_total = perf_counter_ns() - inicio
+            if not estatisticas.iteracoes:
+                estatisticas.iteracoes = self.arvore.visitas - visitas
+            if tracemalloc.is_tracing():
+                estatisticas.memoria_pico = tracemalloc.get_traced_memory()[1]
+            self.estatisticas = estatisticas
+
+    def melhor_jogada(self) -> Jogada | None:
+        if self.resolvedor:
+            return self.melhor_jogada_resolvida()
+
+        # Com o RAVE a seleção quase não volta a um filho de poucas visitas e AMAF ruim, então a média dele
+        # pode ficar alta por sorte; na parada antecipada, as visitas são o que ela garante que não muda
+        if self.escolhe_por_visitas:
+            return max(self.arvore.filhos, key=lambda jogada: self.arvore.filhos[jogada].visitas, default=None)
 
         jogada_escolhida = None
         melhor_resultado = -1.0
@@ -48,57 +256,619 @@ class IA[Jogada]:
                 melhor_resultado = filho.pontuacao
                 jogada_escolhida = jogada
 
-        if jogada_escolhida is None:
-            raise RuntimeError('Sem jogada disponível')
-
         return jogada_escolhida
 
-    def selecao(self, no: No[Jogada], jogo: Jogo[Jogada]) -> No[Jogada]:
-        while not jogo.acabou() and len(no.filhos) == len(jogo.lista_jogadas()):
+    def melhor_jogada_resolvida(self) -> Jogada | None:
+        # Uma vitória provada ganha de tudo e uma derrota provada só é escolhida se não houver outra opção;
+        # entre as demais, a escolha é a de sempre
+        filhos = self.arvore.filhos
+        for jogada, filho in filhos.items():
+            if filho.resolvido == 1.0:
+                return jogada
+
+        candidatas = [jogada for jogada, filho in filhos.items() if filho.resolvido != 0.0] or list(filhos)
+        if self.escolhe_por_visitas:
+            return max(candidatas, key=lambda jogada: filhos[jogada].visitas, default=None)
+        return max(candidatas, key=lambda jogada: filhos[jogada].pontuacao, default=None)
+
+    def busca(self, jogo: Jogo[Jogada], estatisticas: Estatisticas | None = None) -> None:
+        # Uma única cópia por busca: cada iteração joga sobre ela e desfaz as jogadas no final
+        inicio = perf_counter_ns()
+        jogo_atual: Jogo[Jogada] = deepcopy(jogo)
+        prazo = self.prazo()
+        iteracoes = 0
+        self.iteracoes_poupadas = 0
+        self.inicio_busca = perf_counter()
+        if estatisticas is None:
+            while self.continua(iteracoes, self.max_iteracoes, prazo) and not self.decidida(jogo, iteracoes, prazo):
+                self.itera(jogo_atual)
+                iteracoes += 1
+                self.notifica()
+            return
+
+        estatisticas.tempos['copia'] += perf_counter_ns() - inicio
+        while self.continua(iteracoes, self.max_iteracoes, prazo) and not self.decidida(jogo, iteracoes, prazo):
+            self.itera_medida(jogo_atual, estatisticas)
+            iteracoes += 1
+            self.notifica()
+        estatisticas.iteracoes_poupadas += self.iteracoes_poupadas
+
+    def itera(self, jogo: Jogo[Jogada]) -> None:
+        no_atual: No[Jogada] = self.arvore
+        historico: list[Jogada] = []
+
+        no_atual = self.selecao(no_atual, jogo, historico)
+        no_atual = self.expansao(no_atual, jogo, historico)
+        profundidade = len(historico)
+        resultado, visitas = self.simula(jogo, historico)
+        self.propaga(no_atual, historico, profundidade, resultado, visitas)
+        self.desfaz_iteracao(jogo, historico, profundidade, no_atual)
+
+    def itera_medida(self, jogo: Jogo[Jogada], estatisticas: Estatisticas) -> None:
+        # O mesmo que itera, cronometrando cada fase
+        historico: list[Jogada] = []
+        tempos = estatisticas.tempos
+
+        inicio = perf_counter_ns()
+        no_atual = self.selecao(self.arvore, jogo, historico)
+        fim = perf_counter_ns()
+        tempos['selecao'] += fim - inicio
+
+        ramificacao = None if jogo.acabou() else len(jogo.lista_jogadas())
+        inicio = fim
+        no_atual = self.expansao(no_atual, jogo, historico)
+        fim = perf_counter_ns()
+        tempos['expansao'] += fim - inicio
+        profundidade = len(historico)
+        # Um nó que veio da tabela de transposição já tem visitas
+        alocou = ramificacao is not None and no_atual.visitas == 0
+
+        inicio = fim
+        resultado, visitas = self.simula(jogo, historico)
+        fim = perf_counter_ns()
+        tempos['simulacao'] += fim - inicio
+
+        inicio = fim
+        self.propaga(no_atual, historico, profundidade, resultado, visitas)
+        fim = perf_counter_ns()
+        tempos['retropropagacao'] += fim - inicio
+
+        inicio = fim
+        self.desfaz_iteracao(jogo, historico, profundidade, no_atual)
+        tempos['desfaz'] += perf_counter_ns() - inicio
+
+        tamanho_simulacao = len(historico) - profundidade if self.simula_lote is None else None
+        estatisticas.registra(profundidade, tamanho_simulacao, ramificacao, alocou)
+
+    def desfaz_iteracao(
+        self, jogo: Jogo[Jogada], historico: list[Jogada], profundidade: int, folha: No[Jogada]
+    ) -> None:
+        if not self.resolvedor:
+            for jogada in reversed(historico):
+                jogo.desfaz(jogada)
+            return
+
+        for jogada in reversed(historico[profundidade:]):
+            jogo.desfaz(jogada)
+        if folha.resolvido is None and jogo.acabou():
+            ganhador = jogo.ganhador()
+            folha.resolvido = 0.5 if ganhador is None else float(ganhador != jogo.jogador)
+
+        if folha.resolvido is None:
+            for jogada in reversed(historico[:profundidade]):
+                jogo.desfaz(jogada)
+        else:
+            self.resolve(jogo, historico[:profundidade])
+
+    def resolve(self, jogo: Jogo[Jogada], caminho: list[Jogada]) -> None:
+        # Recebe o jogo na folha já provada e desfaz o caminho subindo, provando cada pai pelas regras do
+        # minimax: basta um filho com vitória provada para o pai ser derrota para quem jogou antes, e com
+        # todos os filhos provados o pai vale o complemento do melhor deles
+        nos = [self.arvore]
+        for jogada in caminho:
+            nos.append(nos[-1].filhos[jogada])
+
+        propagando = True
+        for profundidade in range(len(caminho), 0, -1):
+            jogo.desfaz(caminho[profundidade - 1])
+            filho, pai = nos[profundidade], nos[profundidade - 1]
+            if not propagando or filho.resolvido is None or pai.resolvido is not None:
+                propagando = False
+                continue
+
+            if filho.resolvido == 1.0:
+                pai.resolvido = 0.0
+            elif self.expandido(pai, jogo, profundidade - 1) and all(
+                irmao.resolvido is not None for irmao in pai.filhos.values()
+            ):
+                pai.resolvido = 1.0 - max(irmao.resolvido or 0.0 for irmao in pai.filhos.values())
+            else:
+                propagando = False
+
+    def simula(self, jogo: Jogo[Jogada], historico: list[Jogada]) -> tuple[float, int]:
+        if self.simula_lote is None:
+            return self.simulacao(jogo, historico), 1
+        return self.simula_lote(jogo, self.lote), self.lote
+
+    def propaga(
+        self, no: No[Jogada], historico: list[Jogada], profundidade: int, resultado: float, visitas: int
+    ) -> None:
+        if self.rave is not None:
+            self.retropropagacao_rave(no, historico, profundidade, resultado)
+        elif self.transposicoes is None:
+            self.retropropagacao(no, resultado, visitas)
+        else:
+            self.retropropagacao_caminho(historico[:profundidade], resultado, visitas)
+
+    def prazo(self) -> float | None:
+        if self.tempo_limite is None:
+            return None
+        return perf_counter() + self.tempo_limite / 1000
+
+    def continua(self, iteracoes: int, cota: int, prazo: float | None) -> bool:
+        if self.parar.is_set() or self.arvore.resolvido is not None:
+            return False
+        if prazo is None:
+            return iteracoes < cota
+        return perf_counter() < prazo
+
+    def decidida(self, jogo: Jogo[Jogada], iteracoes: int, prazo: float | None) -> bool:
+        if (self.parada_visitas is None and self.z_parada is None) or not iteracoes or iteracoes % INTERVALO_PARADA:
+            return False
+
+        if prazo is None:
+            restantes = self.max_iteracoes - iteracoes
+        else:
+            # No modo por tempo, estima quantas iterações ainda caberiam no prazo pelo ritmo até aqui
+            agora = perf_counter()
+            restantes = int(iteracoes * max(0.0, prazo - agora) / (agora - self.inicio_busca))
+
+        filhos = sorted(self.arvore.filhos.items(), key=lambda item: item[1].visitas, reverse=True)
+        if not filhos or not self.expandido(self.arvore, jogo, 0):
+            return False
+
+        decidida = len(filhos) == 1
+        if not decidida and self.parada_visitas is not None:
+            # Cada iteração dá lote visitas, todas para um filho só
+            (_, primeiro), (_, segundo) = filhos[0], filhos[1]
+            decidida = primeiro.visitas - segundo.visitas > self.parada_visitas * restantes * self.lote
+        if not decidida and self.z_parada is not None:
+            decidida = self.confiante(self.z_parada)
+
+        if decidida:
+            self.iteracoes_poupadas = restantes
+        return decidida
+
+    def confiante(self, z: float) -> bool:
+        # Aproximação normal: o limite inferior da média da jogada escolhida, a mais visitada, passa o limite
+        # superior de todas as outras
+        melhor = self.melhor_jogada()
+        if melhor is None or any(filho.visitas == 0 for filho in self.arvore.filhos.values()):
+            return False
+
+        inferior = margem(self.arvore.filhos[melhor], -z)
+        return all(margem(filho, z) < inferior for jogada, filho in self.arvore.filhos.items() if jogada != melhor)
+
+    def notifica(self) -> None:
+        if self.ao_progredir is not None and perf_counter() >= self.proximo_progresso:
+            self.proximo_progresso = perf_counter() + INTERVALO_PROGRESSO
+            self.ao_progredir()
+
+    def busca_paralela(self, jogo: Jogo[Jogada]) -> None:
+        # Paralelismo na raiz: cada processo faz max_iteracoes iterações numa árvore própria e só as
+        # estatísticas dos filhos da raiz são juntadas
+        if self.compartilhada:
+            self.busca_memoria_compartilhada(jogo)
+            return
+
+        if self.executor is None:
+            from concurrent.futures import ProcessPoolExecutor  # noqa: PLC0415 importar custa caro a quem não usa
+
+            self.executor = ProcessPoolExecutor(self.processos)
+
+        futuros = [
+            self.executor.submit(
+                _busca_isolada,
+                self.c,
+                self.max_iteracoes,
+                self.tempo_limite,
+                self.rave,
+                self.politica,
+                self.lote,
+                jogo,
+                randrange(2**32),
+            )
+            for _ in range(self.processos)
+        ]
+
+        self.arvore = No[Jogada]()
+        for futuro in futuros:
+            for jogada, (visitas, pontuacao) in futuro.result().items():
+                if jogada not in self.arvore.filhos:
+                    self.arvore.adiciona_filho(jogada)
+                self.arvore.filhos[jogada].junta(visitas, pontuacao)
+                self.arvore.visitas += visitas
+
+    def busca_compartilhada(self, jogo: Jogo[Jogada]) -> None:
+        # Paralelismo na árvore: as threads dividem as iterações e percorrem a mesma árvore, só a
+        # simulação roda fora da trava
+        trava = Lock()
+        prazo = self.prazo()
+        cotas = [
+            self.max_iteracoes // self.threads + (1 if i < self.max_iteracoes % self.threads else 0)
+            for i in range(self.threads)
+        ]
+
+        from concurrent.futures import ThreadPoolExecutor  # noqa: PLC0415 importar custa caro a quem não usa
+
+        with ThreadPoolExecutor(self.threads) as executor:
+            futuros = [executor.submit(self._busca_com_trava, deepcopy(jogo), cota, prazo, trava) for cota in cotas]
+        for futuro in futuros:
+            futuro.result()
+
+    def busca_memoria_compartilhada(self, jogo: Jogo[Jogada]) -> None:
+        # Os processos buscam numa árvore em memória compartilhada, e enquanto isso a raiz é copiada para
+        # self.arvore de tempos em tempos, para o progresso; o prazo e o parar chegam aos processos por um evento
+        if self.busca_processos is None:
+            from mcts.compartilhada import (  # noqa: PLC0415 importar custa caro a quem não usa
+                CAPACIDADE,
+                BuscaCompartilhada,
+            )
+
+            self.busca_processos = BuscaCompartilhada[Jogada](self.processos, self.max_nos or CAPACIDADE)
+
+        busca = self.busca_processos
+        prazo = self.prazo()
+        busca.inicia(jogo, self.c, self.max_iteracoes if prazo is None else None, self.politica, self.lote)
+        try:
+            # O parar é conferido antes da primeira espera, para um pedido feito antes da busca valer logo
+            while True:
+                if self.parar.is_set() or (prazo is not None and perf_counter() >= prazo):
+                    busca.para()
+                if busca.espera(INTERVALO_PROGRESSO):
+                    break
+                self.arvore = busca.raiz()
+                self.notifica()
+        finally:
+            busca.para()
+        self.arvore = busca.raiz()
+
+    def _busca_com_trava(self, jogo: Jogo[Jogada], cota: int, prazo: float | None, trava: Lock) -> None:
+        iteracoes = 0
+        while self.continua(iteracoes, cota, prazo):
+            iteracoes += 1
+            historico: list[Jogada] = []
+
+            with trava:
+                no_atual = self.selecao(self.arvore, jogo, historico)
+                no_atual = self.expansao(no_atual, jogo, historico)
+                self.aplica_perda_virtual(no_atual, 1)
+            profundidade = len(historico)
+
+            resultado, visitas = self.simula(jogo, historico)
+
+            with trava:
+                self.aplica_perda_virtual(no_atual, -1)
+                self.propaga(no_atual, historico, profundidade, resultado, visitas)
+                self.notifica()
+
+            for jogada in reversed(historico):
+                jogo.desfaz(jogada)
+
+    def aplica_perda_virtual(self, no: No[Jogada] | None, perdas: int) -> None:
+        # Conta o caminho como derrotas ainda não simuladas para afastar as outras threads dele
+        while no is not None:
+            no.perdas_virtuais += perdas
+            no = no.pai
+
+    def inicia_ponderacao(self, jogo: Jogo[Jogada]) -> None:
+        # Continua buscando na árvore atual enquanto o adversário pensa, até para_ponderacao
+        self.para_ponderacao()
+        self.parar_ponderacao.clear()
+        self.ponderacao = Thread(target=self._pondera, args=(deepcopy(jogo),), daemon=True)
+        self.ponderacao.start()
+
+    def _pondera(self, jogo: Jogo[Jogada]) -> None:
+        while not jogo.acabou() and not self.parar_ponderacao.is_set():
+            self.itera(jogo)
+
+    def para_ponderacao(self) -> None:
+        if self.ponderacao is not None:
+            self.parar_ponderacao.set()
+            self.ponderacao.join()
+            self.ponderacao = None
+
+    def encerra(self) -> None:
+        self.parar.set()
+        self.para_ponderacao()
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+        if self.busca_processos is not None:
+            self.busca_processos.encerra()
+            self.busca_processos = None
+
+    def reinicia(self) -> None:
+        self.para_ponderacao()
+        self.arvore = No[Jogada]()
+        self.quantidade_nos = 1
+        if self.transposicoes is not None:
+            self.transposicoes.limpa()
+
+    def avanca(self, jogada: Jogada) -> None:
+        # Reaproveita a subárvore da jogada feita e descarta as irmãs
+        self.para_ponderacao()
+        filho = self.arvore.filhos.get(jogada)
+        if filho is None:
+            filho = self.filho_simetrico(jogada)
+        if filho is None:
+            self.arvore = No[Jogada]()
+            self.quantidade_nos = 1
+            if self.transposicoes is not None:
+                self.transposicoes.limpa()
+            return
+
+        filho.pai = None
+        self.arvore = filho
+        if self.max_nos is not None:
+            self.quantidade_nos = conta_nos(filho)
+        if self.transposicoes is not None:
+            # Posições que não dá mais para alcançar saem da tabela, senão ela seguraria as subárvores descartadas
+            self.transposicoes.mantem(alcancaveis(filho))
+
+    def filho_simetrico(self, jogada: Jogada) -> No[Jogada] | None:
+        # A jogada feita pode ter sido juntada a uma simétrica; a subárvore dessa serve depois de transformada
+        if not self.arvore.simetrias or self.transforma is None:
+            return None
+
+        for simetria in self.arvore.simetrias:
+            for jogada_filho, filho in self.arvore.filhos.items():
+                if self.transforma(jogada_filho, simetria) == jogada:
+                    transforma_subarvore(filho, simetria, self.transforma)
+                    return filho
+        return None
+
+    def jogadas(self, no: No[Jogada], jogo: Jogo[Jogada], profundidade: int) -> set[Jogada]:
+        if self.simetria is None or profundidade > self.simetria:
+            return jogo.lista_jogadas()
+
+        if no.simetrias is None:
+            # Filhos que já existem, de antes da raiz andar, continuam representando seus grupos
+            distintas, no.simetrias = jogo.jogadas_distintas(no.filhos)
+            if no.simetrias:
+                no.distintas = distintas
+        return jogo.lista_jogadas() if no.distintas is None else no.distintas
+
+    def expandido(self, no: No[Jogada], jogo: Jogo[Jogada], profundidade: int) -> bool:
+        if self.simetria is None or profundidade > self.simetria:
+            return len(no.filhos) == len(jogo.lista_jogadas())
+        return no.filhos.keys() >= self.jogadas(no, jogo, profundidade)
+
+    def selecao(self, no: No[Jogada], jogo: Jogo[Jogada], historico: list[Jogada]) -> No[Jogada]:
+        while not jogo.acabou() and (
+            len(no.filhos) == len(jogo.lista_jogadas())
+            if self.simetria is None
+            else self.expandido(no, jogo, len(historico))
+        ):
             melhor_jogada = None
             maior_intervalo = -1.0
             for jogada in no.filhos:
                 filho = no.filhos[jogada]
-                intervalo = filho.pontuacao + self.c * sqrt(no.visitas / filho.visitas)
+                if filho.resolvido is not None:
+                    continue
+                visitas = filho.visitas + filho.perdas_virtuais
+                valor = filho.pontuacao * filho.visitas / visitas
+                if self.rave is not None and filho.visitas_rave:
+                    # Peso do AMAF cai conforme o filho ganha visitas próprias
+                    peso = sqrt(self.rave / (3 * filho.visitas + self.rave))
+                    valor = (1 - peso) * valor + peso * filho.pontuacao_rave
+                intervalo = valor + self.c * sqrt(no.visitas / visitas)
 
                 if intervalo > maior_intervalo:
                     maior_intervalo = intervalo
                     melhor_jogada = jogada
 
             if melhor_jogada is None:
-                raise RuntimeError('Sem jogada disponível')
+                if not self.resolvedor or not no.filhos:
+                    raise RuntimeError('Sem jogada disponível')
+                # Os filhos foram provados por outro caminho da tabela de transposição
+                no.resolvido = 1.0 - max(filho.resolvido or 0.0 for filho in no.filhos.values())
+                return no
 
             no = no.filhos[melhor_jogada]
             jogo.joga(melhor_jogada)
+            historico.append(melhor_jogada)
 
         return no
 
-    def expansao(self, no: No[Jogada], jogo: Jogo[Jogada]) -> No[Jogada]:
-        if jogo.acabou():
+    def expansao(self, no: No[Jogada], jogo: Jogo[Jogada], historico: list[Jogada]) -> No[Jogada]:
+        if jogo.acabou() or no.resolvido is not None:
             return no
 
-        jogadas = jogo.lista_jogadas().difference(no.filhos.keys())
+        if self.max_nos is not None and self.quantidade_nos >= self.max_nos:
+            if self.poda:
+                self.poda_arvore(no, self.max_nos)
+            # Sem poda, ou com quase tudo protegido e a poda sem abrir espaço, a simulação parte do próprio nó
+            if self.quantidade_nos >= self.max_nos:
+                return no
+
+        jogadas = self.jogadas(no, jogo, len(historico)).difference(no.filhos.keys())
         jogada_escolhida = choice(list(jogadas))
 
-        no.adiciona_filho(jogada_escolhida)
         jogo.joga(jogada_escolhida)
+        historico.append(jogada_escolhida)
 
-        return no.filhos[jogada_escolhida]
+        if self.transposicoes is None:
+            no.adiciona_filho(jogada_escolhida)
+            if self.max_nos is not None:
+                self.quantidade_nos += 1
+            return no.filhos[jogada_escolhida]
 
-    def simulacao(self, jogo: Jogo[Jogada]) -> float:
+        chave = jogo.chave()
+        filho = self.transposicoes.busca(chave)
+        if filho is None:
+            # Sem o pai: com a tabela o caminho vem do histórico, e a referência ao pai prenderia na memória as
+            # árvores de antes de avanca enquanto o nó estivesse na tabela
+            filho = No[Jogada]()
+            self.transposicoes.guarda(chave, filho)
+        no.filhos[jogada_escolhida] = filho
+
+        return filho
+
+    def poda_arvore(self, protegido: No[Jogada], max_nos: int) -> None:
+        # Corta os nós com menos visitas, os mais fundos primeiro no empate, até sobrar FRACAO_PODA do limite. Um
+        # filho nunca tem mais visitas que o pai e está mais fundo que ele, então nessa ordem os filhos saem antes
+        # do pai e cada corte leva um nó só. O nó sendo expandido e seus ancestrais ficam, pois o resultado da
+        # iteração ainda sobe por eles. Os filhos provados de um nó resolvido também ficam: são a prova dele, e
+        # sem eles uma raiz resolvida depois de avanca não teria jogada para escolher
+        excesso = self.quantidade_nos - int(max_nos * FRACAO_PODA)
+        if excesso <= 0:
+            return
+
+        caminho = set()
+        no: No[Jogada] | None = protegido
+        while no is not None:
+            caminho.add(id(no))
+            no = no.pai
+
+        candidatos: list[tuple[int, int, No[Jogada], Jogada, No[Jogada]]] = []
+        pilha = [(self.arvore, 0)]
+        while pilha:
+            pai, profundidade = pilha.pop()
+            for jogada, filho in pai.filhos.items():
+                pilha.append((filho, profundidade + 1))
+                prova = pai.resolvido is not None and filho.resolvido is not None
+                if id(filho) not in caminho and not prova:
+                    candidatos.append((filho.visitas, -profundidade, pai, jogada, filho))
+        candidatos.sort(key=lambda candidato: (candidato[0], candidato[1]))
+
+        for _, _, pai, jogada, filho in candidatos:
+            if excesso <= 0:
+                break
+            # Um nó acima de uma prova leva a prova junto, então o corte pode tirar mais de um nó
+            del pai.filhos[jogada]
+            podados = desliga(filho)
+            self.quantidade_nos -= podados
+            self.nos_podados += podados
+            excesso -= podados
+
+    def simulacao(self, jogo: Jogo[Jogada], historico: list[Jogada]) -> float:
+        # O resultado é do ponto de vista de quem fez a jogada que levou ao nó folha
+        jogador = not jogo.jogador
+        politica = self.politica
         while not jogo.acabou():
-            jogadas = jogo.lista_jogadas()
-            jogada_escolhida = choice(list(jogadas))
+            jogada_escolhida = choice(list(jogo.lista_jogadas())) if politica is None else politica(jogo)
 
             jogo.joga(jogada_escolhida)
+            historico.append(jogada_escolhida)
 
         ganhador = jogo.ganhador()
         if ganhador is None:
             return 0.5
-        return 1.0
+        return 1.0 if ganhador == jogador else 0.0
 
-    def retropropagacao(self, no: No[Jogada] | None, resultado: float) -> None:
+    def retropropagacao(self, no: No[Jogada] | None, resultado: float, visitas: int = 1) -> None:
+        while no is not None:
+            if visitas == 1:
+                no.adiciona_resultado(resultado)
+            else:
+                no.junta(visitas, resultado)
+            no = no.pai
+            resultado = 1.0 - resultado
+
+    def retropropagacao_rave(
+        self, no: No[Jogada] | None, historico: list[Jogada], profundidade: int, resultado: float
+    ) -> None:
+        # Além do caminho, atualiza o AMAF de todo filho cuja jogada foi feita depois, na simulação ou mais
+        # abaixo no caminho, pelo jogador que joga nesse nó. As jogadas ficam separadas pela paridade do índice,
+        # que diz quem as fez
+        jogadas: tuple[set[Jogada], set[Jogada]] = (set(), set())
+        for indice in range(profundidade, len(historico)):
+            jogadas[indice % 2].add(historico[indice])
+
+        indice = profundidade
         while no is not None:
             no.adiciona_resultado(resultado)
+            for jogada in jogadas[indice % 2]:
+                filho = no.filhos.get(jogada)
+                if filho is not None:
+                    filho.adiciona_rave(1.0 - resultado)
+
             no = no.pai
             resultado = 1.0 - resultado
+            indice -= 1
+            if indice >= 0:
+                jogadas[indice % 2].add(historico[indice])
+
+    def retropropagacao_caminho(self, historico: list[Jogada], resultado: float, visitas: int = 1) -> None:
+        # Com a tabela os nós não guardam o pai, que pode ser mais de um, então o caminho é refeito a partir da raiz
+        caminho = [self.arvore]
+        for jogada in historico:
+            caminho.append(caminho[-1].filhos[jogada])
+
+        for no in reversed(caminho):
+            no.junta(visitas, resultado)
+            resultado = 1.0 - resultado
+
+
+def percorre[Jogada](raiz: No[Jogada]) -> 'Iterator[No[Jogada]]':
+    pilha = [raiz]
+    while pilha:
+        no = pilha.pop()
+        yield no
+        pilha.extend(no.filhos.values())
+
+
+def alcancaveis[Jogada](raiz: No[Jogada]) -> set[int]:
+    # Os ids dos nós a partir da raiz; com a tabela de transposição a árvore é um grafo, então cada nó entra uma
+    # vez só, mesmo chegando nele por vários caminhos
+    vistos = {id(raiz)}
+    pilha = [raiz]
+    while pilha:
+        for filho in pilha.pop().filhos.values():
+            if id(filho) not in vistos:
+                vistos.add(id(filho))
+                pilha.append(filho)
+    return vistos
+
+
+def conta_nos[Jogada](raiz: No[Jogada]) -> int:
+    return sum(1 for _ in percorre(raiz))
+
+
+def transforma_subarvore[Jogada](
+    raiz: No[Jogada], simetria: int, transforma: 'Callable[[Jogada, int], Jogada]'
+) -> None:
+    # Leva a subárvore para a posição simétrica; as simetrias guardadas nos nós são recalculadas quando preciso
+    for no in percorre(raiz):
+        no.filhos = {transforma(jogada, simetria): filho for jogada, filho in no.filhos.items()}
+        if no.simetrias is not None:
+            no.simetrias = None
+            no.distintas = None
+
+
+def desliga[Jogada](raiz: No[Jogada]) -> int:
+    # Sem a referência ao pai a subárvore não tem ciclos e é liberada na hora, sem esperar o coletor
+    quantidade = 0
+    for no in percorre(raiz):
+        no.pai = None
+        quantidade += 1
+    return quantidade
+
+
+def _busca_isolada[Jogada](  # noqa: PLR0913
+    c: float,
+    max_iteracoes: int,
+    tempo_limite: int | None,
+    rave: float | None,
+    politica: 'Politica[Jogada] | None',
+    lote: int,
+    jogo: Jogo[Jogada],
+    semente: int,
+) -> dict[Jogada, tuple[int, float]]:
+    seed(semente)
+
+    ia = IA[Jogada](c, max_iteracoes, tempo_limite=tempo_limite, rave=rave, politica=politica, lote=lote)
+    ia.busca(jogo)
+
+    return {jogada: (filho.visitas, filho.pontuacao) for jogada, filho in ia.arvore.filhos.items()}
@@ -1,7 +1,13 @@
 from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable
+from functools import cache
+from itertools import chain
+from random import Random
 
 
 class Jogo[Jogada](ABC):
+    jogador: bool
+
     @abstractmethod
     def lista_jogadas(self) -> set[Jogada]:
         raise NotImplementedError
@@ -10,6 +16,10 @@ class Jogo[Jogada](ABC):
     def joga(self, jogada: Jogada) -> None:
         raise NotImplementedError
 
+    @abstractmethod
+    def desfaz(self, jogada: Jogada) -> None:
+        raise NotImplementedError
+
     @abstractmethod
     def acabou(self) -> bool:
         raise NotImplementedError
@@ -18,27 +28,177 @@ class Jogo[Jogada](ABC):
     def ganhador(self) -> bool | None:
         raise NotImplementedError
 
+    @abstractmethod
+    def chave(self) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def jogada_vencedora(self, jogador: bool) -> Jogada | None:
+        # Uma jogada com que `jogador` ganharia na hora se fosse a vez dele
+        raise NotImplementedError
+
+    def chaves_simetricas(self) -> tuple[int, ...]:
+        # A chave da posição vista por cada simetria do tabuleiro, a começar pela identidade
+        return (self.chave(),)
+
+    def transforma(self, jogada: Jogada, simetria: int) -> Jogada:  # noqa: ARG002
+        return jogada
+
+    def chave_canonica(self) -> int:
+        # Igual para todas as posições simétricas
+        return min(self.chaves_simetricas())
+
+    def jogadas_distintas(self, preferidas: Iterable[Jogada] = ()) -> tuple[set[Jogada], tuple[int, ...]]:
+        # Uma jogada de cada grupo de jogadas que levam a posições simétricas, de preferência entre
+        # `preferidas`, e as simetrias que deixam a posição igual
+        jogadas = self.lista_jogadas()
+        chaves = self.chaves_simetricas()
+        simetrias = tuple(simetria for simetria in range(1, len(chaves)) if chaves[simetria] == chaves[0])
+        if not simetrias:
+            return jogadas, ()
+
+        distintas: set[Jogada] = set()
+        vistas: set[Jogada] = set()
+        for jogada in chain(preferidas, jogadas):
+            if jogada in vistas or jogada not in jogadas:
+                continue
+            distintas.add(jogada)
+            vistas.add(jogada)
+            vistas.update(self.transforma(jogada, simetria) for simetria in simetrias)
+        return distintas, simetrias
+
+
+@cache
+def tabela_zobrist(casas: int) -> tuple[tuple[int, int], ...]:
+    # Um número aleatório por casa e jogador; a semente fixa garante as mesmas chaves em qualquer processo
+    gerador = Random(casas)
+    return tuple((gerador.getrandbits(64), gerador.getrandbits(64)) for _ in range(casas))
+
+
+@cache
+def simetrias_quadrado(tamanho: int) -> tuple[tuple[int, ...], ...]:
+    # As 8 simetrias do quadrado, cada uma como a casa x * tamanho + y para onde vai cada casa
+    ultimo = tamanho - 1
+    transformacoes: tuple[Callable[[int, int], tuple[int, int]], ...] = (
+        lambda x, y: (x, y),
+        lambda x, y: (y, ultimo - x),
+        lambda x, y: (ultimo - x, ultimo - y),
+        lambda x, y: (ultimo - y, x),
+        lambda x, y: (x, ultimo - y),
+        lambda x, y: (ultimo - x, y),
+        lambda x, y: (y, x),
+        lambda x, y: (ultimo - y, ultimo - x),
+    )
+    permutacoes = []
+    for transformacao in transformacoes:
+        destinos = []
+        for x in range(tamanho):
+            for y in range(tamanho):
+                a, b = transformacao(x, y)
+                destinos.append(a * tamanho + b)
+        permutacoes.append(tuple(destinos))
+    return tuple(permutacoes)
+
+
+@cache
+def simetrias_colunas(colunas: int, linhas: int) -> tuple[tuple[int, ...], ...]:
+    # Identidade e espelho das colunas, com a casa coluna * linhas + linha
+    espelho = tuple((colunas - 1 - coluna) * linhas + linha for coluna in range(colunas) for linha in range(linhas))
+    return (tuple(range(colunas * linhas)), espelho)
+
+
+def chaves_simetricas(
+    tabuleiro: list[list[bool | None]], permutacoes: tuple[tuple[int, ...], ...], zobrist: tuple[tuple[int, int], ...]
+) -> tuple[int, ...]:
+    # A chave zobrist do tabuleiro com as casas trocadas por cada permutação
+    chaves = [0] * len(permutacoes)
+    for i, linha in enumerate(tabuleiro):
+        for j, casa in enumerate(linha):
+            if casa is None:
+                continue
+            indice = i * len(linha) + j
+            for simetria, permutacao in enumerate(permutacoes):
+                chaves[simetria] ^= zobrist[permutacao[indice]][casa]
+    return tuple(chaves)
+
 
 JogadaJogoDaVelha = tuple[int, int]
 
 
+@cache
+def casas_vizinhas(tamanho: int, distancia: int) -> tuple[tuple[int, ...], ...]:
+    # Para cada casa x * tamanho + y, as casas a até `distancia` dela em qualquer direção
+    return tuple(
+        tuple(
+            a * tamanho + b
+            for a in range(max(0, x - distancia), min(tamanho, x + distancia + 1))
+            for b in range(max(0, y - distancia), min(tamanho, y + distancia + 1))
+            if (a, b) != (x, y)
+        )
+        for x in range(tamanho)
+        for y in range(tamanho)
+    )
+
+
+class Vizinhanca:
+    # Casas livres a até `distancia` casas de alguma peça, em qualquer direção, mantidas a cada jogada e
+    # desfeita; com o tabuleiro vazio só o centro. As contagens ficam numa lista pelo índice da casa, que
+    # é bem mais rápida que um dicionário com as tuplas
+    def __init__(self, tamanho: int, distancia: int) -> None:
+        if distancia <= 0:
+            raise Exception('A distância da vizinhança passada não é válida.')
+
+        self.tamanho = tamanho
+        self.vizinhas = casas_vizinhas(tamanho, distancia)
+        self.casas: list[JogadaJogoDaVelha] = [(x, y) for x in range(tamanho) for y in range(tamanho)]
+        self.pecas_perto: list[int] = [0] * (tamanho * tamanho)
+        self.livres: set[JogadaJogoDaVelha] = set()
+        self.centro: set[JogadaJogoDaVelha] = {(tamanho // 2, tamanho // 2)}
+
+    def jogadas(self) -> set[JogadaJogoDaVelha]:
+        return self.livres or self.centro
+
+    def joga(self, jogada: JogadaJogoDaVelha, vazias: set[JogadaJogoDaVelha]) -> None:
+        self.livres.discard(jogada)
+        pecas_perto = self.pecas_perto
+        for casa in self.vizinhas[jogada[0] * self.tamanho + jogada[1]]:
+            pecas_perto[casa] += 1
+            if pecas_perto[casa] == 1 and self.casas[casa] in vazias:
+                self.livres.add(self.casas[casa])
+
+    def desfaz(self, jogada: JogadaJogoDaVelha) -> None:
+        pecas_perto = self.pecas_perto
+        indice = jogada[0] * self.tamanho + jogada[1]
+        for casa in self.vizinhas[indice]:
+            pecas_perto[casa] -= 1
+            if not pecas_perto[casa]:
+                self.livres.discard(self.casas[casa])
+        if pecas_perto[indice]:
+            self.livres.add(jogada)
+
+
 class JogoDaVelha(Jogo[JogadaJogoDaVelha]):
-    def __init__(self, tamanho: int, pontos_pra_ganhar: int) -> None:
+    def __init__(self, tamanho: int, pontos_pra_ganhar: int, vizinhanca: int | None = None) -> None:
         if tamanho <= 0:
             raise Exception('O tamanho passado não é válido.')
         if pontos_pra_ganhar <= 1 or pontos_pra_ganhar > tamanho:
             raise Exception('A quantidade de pontos pra ganhar passada não é válida.')
 
         self.terminou: bool = False
+        self.vencedor: bool | None = None
         self.jogador: bool = True
         self.tamanho: int = tamanho
         self.pontos_pra_ganhar: int = pontos_pra_ganhar
         self.tabuleiro: list[list[bool | None]] = [[None for j in range(self.tamanho)] for i in range(self.tamanho)]
         self.jogadas: set[JogadaJogoDaVelha] = {(i, j) for j in range(self.tamanho) for i in range(self.tamanho)}
+        self.zobrist: tuple[tuple[int, int], ...] = tabela_zobrist(tamanho * tamanho)
+        self.hash: int = 0
+        # Em tabuleiros grandes, oferece só as casas perto das peças, tanto na busca quanto nas simulações
+        self.vizinhanca = Vizinhanca(tamanho, vizinhanca) if vizinhanca is not None else None
 
     def lista_jogadas(self) -> set[JogadaJogoDaVelha]:
         if not self.terminou:
-            return self.jogadas
+            return self.jogadas if self.vizinhanca is None else self.vizinhanca.jogadas()
 
         raise Exception('O jogo já terminou.')
 
@@ -48,34 +208,69 @@ class JogoDaVelha(Jogo[JogadaJogoDaVelha]):
             raise Exception('A jogada não é válida.')
 
         self.jogadas.remove(jogada)
+        if self.vizinhanca is not None:
+            self.vizinhanca.joga(jogada, self.jogadas)
         self.tabuleiro[x][y] = self.jogador
+        self.hash ^= self.zobrist[x * self.tamanho + y][self.jogador]
+        self.vencedor = self._verifica_ganhador(x, y)
         self.jogador = not self.jogador
 
-        if not self.jogadas or self.ganhador() is not None:
+        if not self.jogadas or self.vencedor is not None:
             self.terminou = True
 
+    def desfaz(self, jogada: JogadaJogoDaVelha) -> None:
+        x, y = jogada
+        if self.tabuleiro[x][y] is None:
+            raise Exception('A jogada não pode ser desfeita.')
+
+        self.tabuleiro[x][y] = None
+        self.jogadas.add(jogada)
+        if self.vizinhanca is not None:
+            self.vizinhanca.desfaz(jogada)
+        self.jogador = not self.jogador
+        self.hash ^= self.zobrist[x * self.tamanho + y][self.jogador]
+        self.vencedor = None
+        self.terminou = False
+
+    def _verifica_ganhador(self, i: int, j: int) -> bool | None:
+        # Só as linhas que passam pela última jogada podem ter formado uma sequência nova
+        for x, y in [(0, 1), (1, 0), (1, 1), (-1, 1)]:
+            pontos = 1
+            for sentido in (1, -1):
+                a, b = i + sentido * x, j + sentido * y
+                while 0 <= a < self.tamanho and 0 <= b < self.tamanho and self.tabuleiro[a][b] == self.tabuleiro[i][j]:
+                    pontos += 1
+                    a, b = a + sentido * x, b + sentido * y
+            if pontos >= self.pontos_pra_ganhar:
+                return self.tabuleiro[i][j]
+
+        return None
+
     def acabou(self) -> bool:
         return self.terminou
 
+    def jogada_vencedora(self, jogador: bool) -> JogadaJogoDaVelha | None:
+        for x, y in self.jogadas:
+            self.tabuleiro[x][y] = jogador
+            ganhou = self._verifica_ganhador(x, y) is not None
+            self.tabuleiro[x][y] = None
+            if ganhou:
+                return (x, y)
+        return None
+
+    def chaves_simetricas(self) -> tuple[int, ...]:
+        return chaves_simetricas(self.tabuleiro, simetrias_quadrado(self.tamanho), self.zobrist)
+
+    def transforma(self, jogada: JogadaJogoDaVelha, simetria: int) -> JogadaJogoDaVelha:
+        casa = simetrias_quadrado(self.tamanho)[simetria][jogada[0] * self.tamanho + jogada[1]]
+        x, y = divmod(casa, self.tamanho)
+        return (x, y)
+
     def ganhador(self) -> bool | None:
-        for i in range(self.tamanho):
-            for j in range(self.tamanho):
-                if self.tabuleiro[i][j] is not None:
-                    # Para cada peça do tabuleiro tenta estender linha, coluna e as duas diagonais
-                    for x, y in [(0, 1), (1, 0), (1, 1), (-1, 1)]:
-                        pontos = 1
-                        a, b = i + x, j + y
-                        while (
-                            0 <= a < self.tamanho
-                            and 0 <= b < self.tamanho
-                            and self.tabuleiro[a][b] == self.tabuleiro[i][j]
-                        ):
-                            pontos += 1
-                            if pontos == self.pontos_pra_ganhar:
-                                return self.tabuleiro[i][j]
-                            a, b = a + x, b + y
+        return self.vencedor
 
-        return None
+    def chave(self) -> int:
+        return self.hash
 
 
 JogadaLig4 = int
@@ -96,24 +291,40 @@ class Lig4(Jogo[JogadaLig4]):
         self.linhas = linhas
         self.casas_pra_ganhar = casas_pra_ganhar
         self.tabuleiro: list[list[bool | None]] = [[None for _ in range(linhas)] for _ in range(colunas)]
+        self.alturas: list[int] = [0 for _ in range(colunas)]
         self.jogadas = 0
+        self.zobrist: tuple[tuple[int, int], ...] = tabela_zobrist(colunas * linhas)
+        self.hash: int = 0
 
     def lista_jogadas(self) -> set[JogadaLig4]:
         if self.acabou():
             raise RuntimeError('O jogo já terminou')
 
-        return {i for i, coluna in enumerate(self.tabuleiro) if coluna.count(None) != 0}
+        return {i for i, altura in enumerate(self.alturas) if altura < self.linhas}
 
     def joga(self, jogada: JogadaLig4) -> None:
-        if self.tabuleiro[jogada].count(None) == 0:
+        if self.alturas[jogada] == self.linhas:
             raise ValueError('Jogada não é válida')
 
-        casa = self.tabuleiro[jogada].index(None)
+        casa = self.alturas[jogada]
         self.tabuleiro[jogada][casa] = self.jogador
+        self.alturas[jogada] += 1
+        self.hash ^= self.zobrist[jogada * self.linhas + casa][self.jogador]
         self.vencedor = self._verifica_ganhador(jogada, casa)
         self.jogador = not self.jogador
         self.jogadas += 1
 
+    def desfaz(self, jogada: JogadaLig4) -> None:
+        if self.alturas[jogada] == 0:
+            raise ValueError('Jogada não pode ser desfeita')
+
+        self.alturas[jogada] -= 1
+        self.tabuleiro[jogada][self.alturas[jogada]] = None
+        self.vencedor = None
+        self.jogador = not self.jogador
+        self.jogadas -= 1
+        self.hash ^= self.zobrist[jogada * self.linhas + self.alturas[jogada]][self.jogador]
+
     def _verifica_ganhador(self, coluna: int, linha: int) -> bool | None:
         ligs = [[0 for _ in range(3)] for _ in range(3)]
         for x in (-1, 0, 1):
@@ -144,5 +355,25 @@ class Lig4(Jogo[JogadaLig4]):
     def acabou(self) -> bool:
         return self.vencedor is not None or self.jogadas == self.colunas * self.linhas
 
+    def jogada_vencedora(self, jogador: bool) -> JogadaLig4 | None:
+        for coluna, linha in enumerate(self.alturas):
+            if linha == self.linhas:
+                continue
+            self.tabuleiro[coluna][linha] = jogador
+            ganhou = self._verifica_ganhador(coluna, linha) is not None
+            self.tabuleiro[coluna][linha] = None
+            if ganhou:
+                return coluna
+        return None
+
+    def chaves_simetricas(self) -> tuple[int, ...]:
+        return chaves_simetricas(self.tabuleiro, simetrias_colunas(self.colunas, self.linhas), self.zobrist)
+
+    def transforma(self, jogada: JogadaLig4, simetria: int) -> JogadaLig4:
+        return jogada if simetria == 0 else self.colunas - 1 - jogada
+
     def ganhador(self) -> bool | None:
         return self.vencedor
+
+    def chave(self) -> int:
+        return self.hash
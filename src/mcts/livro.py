@@ -0,0 +1,196 @@
+import mmap
+import struct
+from argparse import ArgumentParser, Namespace
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from random import randrange, seed
+from typing import TYPE_CHECKING
+
+from mcts.bitboard import JogoDaVelhaBitboard, Lig4Bitboard
+from mcts.ia import IA
+from mcts.jogo import Jogo, JogoDaVelha, Lig4
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+# Cabeçalho: assinatura, tipo do jogo, três dimensões e quantidade de posições
+CABECALHO = struct.Struct('<8sBHHHI')
+# Posição: chave zobrist, jogada codificada, visitas da posição, visitas da jogada e pontuação da jogada
+ENTRADA = struct.Struct('<QiIIf')
+ASSINATURA = b'MCTSLIVR'
+JOGO_DA_VELHA = 0
+LIG4 = 1
+
+Descricao = tuple[int, int, int, int]
+
+
+def descricao(jogo: object) -> Descricao | None:
+    # Identifica a variante do jogo; a chave zobrist só depende da quantidade de casas, então o livro
+    # precisa saber para qual variante foi gerado
+    if isinstance(jogo, JogoDaVelha | JogoDaVelhaBitboard):
+        return (JOGO_DA_VELHA, jogo.tamanho, jogo.pontos_pra_ganhar, 0)
+    if isinstance(jogo, Lig4 | Lig4Bitboard):
+        return (LIG4, jogo.colunas, jogo.linhas, jogo.casas_pra_ganhar)
+    return None
+
+
+def codifica(variante: Descricao, jogada: object) -> int:
+    if isinstance(jogada, int):
+        return jogada
+    if variante[0] == JOGO_DA_VELHA and isinstance(jogada, tuple):
+        x, y = jogada
+        return int(x) * variante[1] + int(y)
+    raise ValueError('Jogada não pode ser guardada no livro')
+
+
+class LivroAberturas:
+    # Arquivo com as entradas ordenadas pela chave, lido via mmap: abrir não carrega nada na memória e
+    # cada consulta é uma busca binária
+    def __init__(self, caminho: str | Path) -> None:
+        with Path(caminho).open('rb') as arquivo:
+            self.dados = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+
+        assinatura, tipo, a, b, c, quantidade = CABECALHO.unpack_from(self.dados, 0)
+        if assinatura != ASSINATURA or len(self.dados) != CABECALHO.size + quantidade * ENTRADA.size:
+            self.dados.close()
+            raise ValueError('Arquivo não é um livro de aberturas válido')
+
+        self.variante: Descricao = (tipo, a, b, c)
+        self.quantidade: int = quantidade
+
+    def __len__(self) -> int:
+        return self.quantidade
+
+    def consulta(self, chave: int) -> tuple[int, int, int, float] | None:
+        inicio, fim = 0, self.quantidade
+        while inicio < fim:
+            meio = (inicio + fim) // 2
+            chave_meio, *resto = ENTRADA.unpack_from(self.dados, CABECALHO.size + meio * ENTRADA.size)
+            if chave_meio == chave:
+                codigo, visitas, visitas_jogada, pontuacao = resto
+                return (codigo, visitas, visitas_jogada, pontuacao)
+            if chave_meio < chave:
+                inicio = meio + 1
+            else:
+                fim = meio
+        return None
+
+    def busca[Jogada](self, jogo: Jogo[Jogada]) -> Jogada | None:
+        if jogo.acabou() or descricao(jogo) != self.variante:
+            return None
+
+        entrada = self.consulta(jogo.chave())
+        if entrada is None:
+            return None
+
+        # Procurar entre as jogadas válidas já descarta uma colisão de chaves
+        for jogada in jogo.lista_jogadas():
+            if codifica(self.variante, jogada) == entrada[0]:
+                return jogada
+        return None
+
+    def fecha(self) -> None:
+        self.dados.close()
+
+
+def posicoes[Jogada](novo_jogo: 'Callable[[], Jogo[Jogada]]', jogadas: int) -> dict[int, list[Jogada]]:
+    # Todas as posições não terminadas com menos de `jogadas` jogadas feitas, cada uma com um caminho até ela
+    encontradas: dict[int, list[Jogada]] = {}
+    jogo = novo_jogo()
+    nivel: list[list[Jogada]] = [[]]
+    for _ in range(jogadas):
+        proximo: list[list[Jogada]] = []
+        for historico in nivel:
+            for jogada in historico:
+                jogo.joga(jogada)
+
+            chave = jogo.chave()
+            if chave not in encontradas and not jogo.acabou():
+                encontradas[chave] = historico
+                proximo.extend([*historico, jogada] for jogada in jogo.lista_jogadas())
+
+            for jogada in reversed(historico):
+                jogo.desfaz(jogada)
+        nivel = proximo
+
+    return encontradas
+
+
+def _analisa[Jogada](
+    novo_jogo: 'Callable[[], Jogo[Jogada]]', historico: list[Jogada], c: float, iteracoes: int, semente: int
+) -> tuple[Jogada, int, int, float]:
+    seed(semente)
+
+    jogo = novo_jogo()
+    for jogada in historico:
+        jogo.joga(jogada)
+
+    ia = IA[Jogada](c, iteracoes)
+    jogada = ia.escolhe_jogada(jogo)
+    filho = ia.arvore.filhos[jogada]
+    return (jogada, ia.arvore.visitas, filho.visitas, filho.pontuacao)
+
+
+def gera[Jogada](  # noqa: PLR0913
+    novo_jogo: 'Callable[[], Jogo[Jogada]]', jogadas: int, c: float, iteracoes: int, processos: int, caminho: Path
+) -> int:
+    variante = descricao(novo_jogo())
+    if variante is None:
+        raise ValueError('Jogo sem suporte no livro de aberturas')
+
+    encontradas = posicoes(novo_jogo, jogadas)
+    chaves = sorted(encontradas)
+    with ProcessPoolExecutor(processos) as executor:
+        futuros = [
+            executor.submit(_analisa, novo_jogo, encontradas[chave], c, iteracoes, randrange(2**32))
+            for chave in chaves
+        ]
+        analises = [futuro.result() for futuro in futuros]
+
+    with caminho.open('wb') as arquivo:
+        arquivo.write(CABECALHO.pack(ASSINATURA, *variante, len(chaves)))
+        for chave, (jogada, visitas, visitas_jogada, pontuacao) in zip(chaves, analises, strict=True):
+            arquivo.write(ENTRADA.pack(chave, codifica(variante, jogada), visitas, visitas_jogada, pontuacao))
+
+    return len(chaves)
+
+
+def argumentos_linha_de_comando() -> Namespace:
+    parser = ArgumentParser(description='Gera um livro de aberturas com buscas longas nas primeiras jogadas.')
+    parser.add_argument('saida', type=Path)
+    parser.add_argument('--jogo', choices=('velha', 'lig4'), default='velha')
+    parser.add_argument('--tamanho', type=int, default=3)
+    parser.add_argument('--pontos', type=int, default=3)
+    parser.add_argument('--colunas', type=int, default=7)
+    parser.add_argument('--linhas', type=int, default=6)
+    parser.add_argument('--casas', type=int, default=4)
+    parser.add_argument('--jogadas', type=int, default=2, help='quantas jogadas iniciais o livro cobre')
+    parser.add_argument('--c', type=float, default=0.1)
+    parser.add_argument('--iteracoes', type=int, default=100000)
+    parser.add_argument('--processos', type=int, default=1)
+    parser.add_argument('--semente', type=int)
+    return parser.parse_args()
+
+
+def main() -> None:
+    argumentos = argumentos_linha_de_comando()
+    if argumentos.semente is not None:
+        seed(argumentos.semente)
+
+    if argumentos.jogo == 'velha':
+        velha = partial(JogoDaVelhaBitboard, argumentos.tamanho, argumentos.pontos)
+        quantidade = gera(
+            velha, argumentos.jogadas, argumentos.c, argumentos.iteracoes, argumentos.processos, argumentos.saida
+        )
+    else:
+        lig4 = partial(Lig4Bitboard, argumentos.colunas, argumentos.linhas, argumentos.casas)
+        quantidade = gera(
+            lig4, argumentos.jogadas, argumentos.c, argumentos.iteracoes, argumentos.processos, argumentos.saida
+        )
+
+    print(f'{quantidade} posições gravadas em {argumentos.saida}')  # noqa: T201
+
+
+if __name__ == '__main__':
+    main()
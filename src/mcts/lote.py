@@ -0,0 +1,72 @@
+from random import getrandbits
+
+import numpy as np
+
+from mcts.bitboard import Lig4Bitboard
+from mcts.jogo import Lig4
+
+DIRECOES = ((1, 0), (0, 1), (1, 1), (1, -1))
+
+
+def simula_lote(jogo: object, quantidade: int) -> float:
+    if isinstance(jogo, Lig4 | Lig4Bitboard):
+        return simula_lote_lig4(jogo, quantidade)
+
+    raise TypeError('Simulação em lote só está disponível para o lig 4')
+
+
+def simula_lote_lig4(jogo: Lig4 | Lig4Bitboard, quantidade: int) -> float:
+    # Joga `quantidade` partidas aleatórias ao mesmo tempo a partir da posição atual e devolve o resultado
+    # médio do ponto de vista de quem fez a última jogada, como IA.simulacao
+    jogador = not jogo.jogador
+    if jogo.acabou():
+        return 0.5 if jogo.ganhador() is None else float(jogo.ganhador() == jogador)
+
+    gerador = np.random.default_rng(getrandbits(64))
+    colunas, linhas, casas = jogo.colunas, jogo.linhas, jogo.casas_pra_ganhar
+
+    # 1 para as peças de True, -1 para as de False
+    valores = [[0 if casa is None else (1 if casa else -1) for casa in coluna] for coluna in jogo.tabuleiro]
+    tabuleiros = np.repeat(np.array(valores, dtype=np.int8)[np.newaxis], quantidade, axis=0)
+    alturas = np.repeat(np.array(jogo.alturas, dtype=np.int64)[np.newaxis], quantidade, axis=0)
+    ganhadores = np.zeros(quantidade, dtype=np.int8)
+    ativas = np.ones(quantidade, dtype=bool)
+    partidas = np.arange(quantidade)
+
+    vez = 1 if jogo.jogador else -1
+    while ativas.any():
+        # Sorteia uma coluna entre as que ainda têm espaço; partidas sem nenhuma terminam empatadas
+        validas = (alturas < linhas) & ativas[:, np.newaxis]
+        ativas &= validas.any(axis=1)
+        indices = partidas[ativas]
+        if indices.size == 0:
+            break
+
+        sorteio = np.where(validas[indices], gerador.random((indices.size, colunas)), -1.0)
+        coluna = sorteio.argmax(axis=1)
+        linha = alturas[indices, coluna]
+        tabuleiros[indices, coluna, linha] = vez
+        alturas[indices, coluna] += 1
+
+        venceu = np.zeros(indices.size, dtype=bool)
+        for dx, dy in DIRECOES:
+            pontos = np.ones(indices.size, dtype=np.int64)
+            for sentido in (1, -1):
+                seguindo = np.ones(indices.size, dtype=bool)
+                for passo in range(1, casas):
+                    x = coluna + sentido * passo * dx
+                    y = linha + sentido * passo * dy
+                    dentro = (x >= 0) & (x < colunas) & (y >= 0) & (y < linhas)
+                    seguindo &= dentro
+                    casa = tabuleiros[indices, np.clip(x, 0, colunas - 1), np.clip(y, 0, linhas - 1)]
+                    seguindo &= casa == vez
+                    pontos += seguindo
+            venceu |= pontos >= casas
+
+        ganhadores[indices[venceu]] = vez
+        ativas[indices[venceu]] = False
+        vez = -vez
+
+    valor_jogador = 1 if jogador else -1
+    resultados = np.where(ganhadores == 0, 0.5, np.where(ganhadores == valor_jogador, 1.0, 0.0))
+    return float(resultados.mean())
@@ -1,23 +1,77 @@
-from mcts.tela import Tela, TelaLig4
+# A interface só é importada pelos pontos de entrada: o textual demora a carregar e a IA não precisa dele
 
 C = 0.1
 max_iteracoes = 1000
+processos = 1
+threads = 1
+# Com processos, todos buscam numa árvore só em memória compartilhada em vez de cada um numa árvore própria
+compartilhada = False
+tempo_limite: int | None = None
+ponderar = False
+arvore_compacta = False
+transposicoes: int | None = None
+lote_lig4 = 1
+coleta_estatisticas = False
+# Caminho de um livro gerado com mcts-livro para a mesma variante do jogo
+livro_velha: str | None = None
+livro_lig4: str | None = None
+# Equivalência do RAVE; None desliga
+rave: float | None = None
+resolvedor = False
+# Para a busca quando o filho mais visitado da raiz está à frente do segundo por mais que essa fração das
+# iterações restantes, ou quando a confiança de que é a melhor jogada passa desse valor. Ligada, a IA joga a mais
+# visitada; com 1 e sem tempo_limite, é a mesma jogada que a busca inteira daria
+parada_visitas: float | None = None
+parada_confianca: float | None = None
+# Limite de nós da árvore da IA; ao chegar nele poda as subárvores menos visitadas, ou para de expandir sem a poda
+max_nos: int | None = None
+poda = True
+# Política das simulações, pelo nome em mcts.politica.POLITICAS; None sorteia as jogadas
+politica: str | None = None
+# Até essa profundidade a partir da raiz, jogadas simétricas viram um filho só; None desliga
+simetria: int | None = None
 jogador_vai_primeiro = True
 tamanho = 3
 pontos_pra_ganhar = 3
+bitboard = True
+# Em tabuleiros grandes, como 15 com 5 pontos, só considera casas a até essa distância das peças; None desliga
+vizinhanca: int | None = None
 
 
 def main() -> None:
+    from mcts.tela import Tela  # noqa: PLC0415
+
     Tela(
         c=C,
         max_iteracoes=max_iteracoes,
         jogador_vai_primeiro=jogador_vai_primeiro,
         tamanho=tamanho,
         pontos_pra_ganhar=pontos_pra_ganhar,
+        vizinhanca=vizinhanca,
+        bitboard=bitboard,
+        processos=processos,
+        threads=threads,
+        compartilhada=compartilhada,
+        tempo_limite=tempo_limite,
+        ponderar=ponderar,
+        arvore_compacta=arvore_compacta,
+        transposicoes=transposicoes,
+        coleta_estatisticas=coleta_estatisticas,
+        livro=livro_velha,
+        rave=rave,
+        resolvedor=resolvedor,
+        parada_visitas=parada_visitas,
+        parada_confianca=parada_confianca,
+        max_nos=max_nos,
+        poda=poda,
+        politica=politica,
+        simetria=simetria,
     ).run()
 
 
 def main_lig4() -> None:
+    from mcts.tela import TelaLig4  # noqa: PLC0415
+
     TelaLig4(
         c=C,
         max_iteracoes=max_iteracoes,
@@ -25,6 +79,25 @@ def main_lig4() -> None:
         colunas=7,
         linhas=6,
         casas_para_ganhar=4,
+        lote=lote_lig4,
+        bitboard=bitboard,
+        processos=processos,
+        threads=threads,
+        compartilhada=compartilhada,
+        tempo_limite=tempo_limite,
+        ponderar=ponderar,
+        arvore_compacta=arvore_compacta,
+        transposicoes=transposicoes,
+        coleta_estatisticas=coleta_estatisticas,
+        livro=livro_lig4,
+        rave=rave,
+        resolvedor=resolvedor,
+        parada_visitas=parada_visitas,
+        parada_confianca=parada_confianca,
+        max_nos=max_nos,
+        poda=poda,
+        politica=politica,
+        simetria=simetria,
     ).run()
 
 
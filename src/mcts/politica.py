@@ -0,0 +1,27 @@
+from random import choice
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from mcts.jogo import Jogo
+
+# Escolhe a próxima jogada de uma simulação
+type Politica[Jogada] = Callable[[Jogo[Jogada]], Jogada]
+
+
+def aleatoria[Jogada](jogo: 'Jogo[Jogada]') -> Jogada:
+    return choice(list(jogo.lista_jogadas()))
+
+
+def tatica[Jogada](jogo: 'Jogo[Jogada]') -> Jogada:
+    # Ganha se der, senão bloqueia a vitória imediata do adversário, senão joga ao acaso
+    jogada = jogo.jogada_vencedora(jogo.jogador)
+    if jogada is None:
+        jogada = jogo.jogada_vencedora(not jogo.jogador)
+    if jogada is None:
+        jogada = choice(list(jogo.lista_jogadas()))
+    return jogada
+
+
+POLITICAS: dict[str, Politica[Any]] = {'aleatoria': aleatoria, 'tatica': tatica}
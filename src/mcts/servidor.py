@@ -0,0 +1,341 @@
+import json
+import socketserver
+import sys
+import zlib
+from argparse import ArgumentParser, Namespace
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from functools import partial
+from itertools import count
+from threading import BoundedSemaphore, Lock, Timer
+from time import monotonic, perf_counter
+from typing import IO, TYPE_CHECKING, Any
+
+from mcts.bitboard import JogoDaVelhaBitboard, Lig4Bitboard
+from mcts.ia import IA
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+    from mcts.jogo import Jogo
+
+PARTIDAS_EM_CACHE = 64
+
+# Um pedido ou uma resposta, uma linha de JSON cada
+Mensagem = dict[str, Any]
+Descricao = tuple[object, ...]
+
+
+class Partida:
+    # Jogo e IA de uma partida, com as jogadas feitas até aqui; a árvore da IA fica na posição atual
+    def __init__(self, descricao: Descricao, jogo: 'Jogo[Any]', ia: IA[Any]) -> None:
+        self.descricao = descricao
+        self.jogo = jogo
+        self.ia = ia
+        self.jogadas: list[Any] = []
+
+    def joga(self, jogada: object) -> None:
+        self.jogo.joga(jogada)
+        self.ia.avanca(jogada)
+        self.jogadas.append(jogada)
+
+
+class CachePartidas:
+    # Partidas de cada processo pelo identificador mandado nos pedidos; quando enche, esquece a usada há
+    # mais tempo
+    def __init__(self, tamanho_maximo: int) -> None:
+        self.tamanho_maximo = tamanho_maximo
+        self.partidas: OrderedDict[str, Partida] = OrderedDict()
+
+    def busca(self, identificador: str, descricao: Descricao, jogadas: list[Any]) -> Partida | None:
+        partida = self.partidas.get(identificador)
+        if partida is None:
+            return None
+        # Só serve se os pedidos novos continuarem a mesma partida
+        if partida.descricao != descricao or partida.jogadas != jogadas[: len(partida.jogadas)]:
+            self.descarta(identificador)
+            return None
+        self.partidas.move_to_end(identificador)
+        return partida
+
+    def guarda(self, identificador: str, partida: Partida) -> None:
+        self.partidas[identificador] = partida
+        self.partidas.move_to_end(identificador)
+        if len(self.partidas) > self.tamanho_maximo:
+            _, antiga = self.partidas.popitem(last=False)
+            antiga.ia.encerra()
+
+    def descarta(self, identificador: str) -> None:
+        partida = self.partidas.pop(identificador, None)
+        if partida is not None:
+            partida.ia.encerra()
+
+
+_cache = CachePartidas(PARTIDAS_EM_CACHE)
+
+
+def _inicia_processo(partidas_em_cache: int) -> None:
+    _cache.tamanho_maximo = partidas_em_cache
+
+
+def novo_jogo(pedido: Mensagem) -> tuple[Descricao, 'Jogo[Any]']:
+    tipo = pedido.get('jogo', 'velha')
+    if tipo == 'velha':
+        tamanho = int(pedido.get('tamanho', 3))
+        pontos = int(pedido.get('pontos', tamanho))
+        vizinhanca = pedido.get('vizinhanca')
+        return (tipo, tamanho, pontos, vizinhanca), JogoDaVelhaBitboard(tamanho, pontos, vizinhanca)
+    if tipo == 'lig4':
+        colunas = int(pedido.get('colunas', 7))
+        linhas = int(pedido.get('linhas', 6))
+        casas = int(pedido.get('casas', 4))
+        return (tipo, colunas, linhas, casas), Lig4Bitboard(colunas, linhas, casas)
+    raise ValueError(f'Jogo desconhecido: {tipo}')
+
+
+def decodifica(tipo: object, jogada: Any) -> object:  # noqa: ANN401
+    if tipo == 'velha':
+        x, y = jogada
+        return (int(x), int(y))
+    return int(jogada)
+
+
+def codifica(jogada: object) -> object:
+    return list(jogada) if isinstance(jogada, tuple) else jogada
+
+
+def prepara(pedido: Mensagem) -> tuple[Partida, int]:
+    # Devolve a partida na posição pedida e quantas jogadas vieram do cache
+    descricao, jogo = novo_jogo(pedido)
+    jogadas = [decodifica(descricao[0], jogada) for jogada in pedido.get('jogadas', [])]
+    identificador = pedido.get('partida')
+
+    partida = _cache.busca(str(identificador), descricao, jogadas) if identificador is not None else None
+    if partida is None:
+        partida = Partida(descricao, jogo, IA[Any](float(pedido['c']), 1))
+        if identificador is not None:
+            _cache.guarda(str(identificador), partida)
+    do_cache = len(partida.jogadas)
+
+    try:
+        for jogada in jogadas[do_cache:]:
+            partida.joga(jogada)
+    except Exception:
+        # Uma jogada inválida deixaria a partida guardada numa posição que ninguém pediu
+        if identificador is not None:
+            _cache.descarta(str(identificador))
+        raise
+    return partida, do_cache
+
+
+class Relogio:
+    # Para a busca quando o prazo vence. O relógio só é armado pela própria busca, no primeiro aviso de
+    # progresso, para ela fazer ao menos uma iteração e ter o que responder mesmo com um prazo curto
+    def __init__(self, ia: IA[Any], prazo: float) -> None:
+        self.ia = ia
+        self.prazo = prazo
+        self.timer: Timer | None = None
+        ia.ao_progredir = self.arma
+        ia.proximo_progresso = 0.0
+
+    def arma(self) -> None:
+        self.ia.ao_progredir = None
+        restante = self.prazo - monotonic()
+        if restante <= 0:
+            self.ia.parar.set()
+            return
+        self.timer = Timer(restante, self.ia.parar.set)
+        self.timer.start()
+
+    def desarma(self) -> None:
+        self.ia.ao_progredir = None
+        if self.timer is not None:
+            self.timer.cancel()
+
+
+def _analisa(pedido: Mensagem, recebido: float) -> Mensagem:
+    prazo = None
+    if pedido.get('prazo_ms') is not None:
+        prazo = recebido + float(pedido['prazo_ms']) / 1000
+        if prazo <= monotonic():
+            raise TimeoutError('Prazo esgotado antes da busca começar')
+    if pedido.get('iteracoes') is None and pedido.get('tempo_ms') is None:
+        raise ValueError('O pedido precisa de iteracoes ou tempo_ms')
+
+    partida, do_cache = prepara(pedido)
+    if partida.jogo.acabou():
+        raise ValueError('A partida já acabou')
+
+    ia = partida.ia
+    ia.c = float(pedido['c'])
+    ia.max_iteracoes = int(pedido.get('iteracoes') or 0)
+    ia.tempo_limite = int(pedido['tempo_ms']) if pedido.get('tempo_ms') is not None else None
+    visitas_anteriores = ia.arvore.visitas
+
+    # O prazo vale para qualquer orçamento: ao vencer, a busca para com a melhor jogada até então. O parar
+    # pode ter ficado ligado por um relógio que venceu no fim do pedido anterior
+    ia.parar.clear()
+    relogio = Relogio(ia, prazo) if prazo is not None else None
+    inicio = perf_counter()
+    try:
+        jogada = ia.escolhe_jogada(partida.jogo)
+    finally:
+        if relogio is not None:
+            relogio.desarma()
+    tempo = perf_counter() - inicio
+
+    filhos = sorted(ia.arvore.filhos.items(), key=lambda item: item[1].visitas, reverse=True)
+    return {
+        'jogada': codifica(jogada),
+        'visitas': ia.arvore.visitas,
+        'visitas_reaproveitadas': visitas_anteriores,
+        'iteracoes': ia.arvore.visitas - visitas_anteriores,
+        'tempo_ms': tempo * 1000,
+        'jogadas_do_cache': do_cache,
+        'filhos': [
+            {'jogada': codifica(jogada_filho), 'visitas': filho.visitas, 'pontuacao': filho.pontuacao}
+            for jogada_filho, filho in filhos
+        ],
+    }
+
+
+def analisa(pedido: Mensagem, recebido: float) -> Mensagem:
+    # Roda num processo do servidor; qualquer erro vira uma resposta com o campo erro
+    resposta: Mensagem = {'id': pedido.get('id')}
+    try:
+        resposta |= _analisa(pedido, recebido)
+    except Exception as erro:  # noqa: BLE001
+        resposta['erro'] = str(erro) or type(erro).__name__
+    return resposta
+
+
+class Servidor:
+    # Cada processo tem seu cache de partidas e os pedidos de uma partida sempre vão para o mesmo
+    # processo. No máximo `fila` pedidos ficam pendentes; depois disso, ler o próximo espera uma vaga
+    def __init__(self, processos: int, fila: int, partidas_em_cache: int, c: float) -> None:
+        self.executores = [
+            ProcessPoolExecutor(1, initializer=_inicia_processo, initargs=(partidas_em_cache,))
+            for _ in range(processos)
+        ]
+        self.vagas = BoundedSemaphore(fila)
+        self.c = c
+        self.sem_partida = count()
+
+    def executor(self, pedido: Mensagem) -> ProcessPoolExecutor:
+        identificador = pedido.get('partida')
+        if identificador is None:
+            return self.executores[next(self.sem_partida) % len(self.executores)]
+        return self.executores[zlib.crc32(str(identificador).encode()) % len(self.executores)]
+
+    def atende(self, linha: str, responde: 'Callable[[Mensagem], None]') -> Future[Mensagem] | None:
+        recebido = monotonic()
+        try:
+            pedido = json.loads(linha)
+        except json.JSONDecodeError as erro:
+            responde({'id': None, 'erro': f'JSON inválido: {erro}'})
+            return None
+        if not isinstance(pedido, dict):
+            responde({'id': None, 'erro': 'O pedido precisa ser um objeto JSON'})
+            return None
+
+        pedido.setdefault('c', self.c)
+        self.vagas.acquire()
+        futuro = self.executor(pedido).submit(analisa, pedido, recebido)
+        futuro.add_done_callback(partial(self._terminou, pedido, responde))
+        return futuro
+
+    def _terminou(self, pedido: Mensagem, responde: 'Callable[[Mensagem], None]', futuro: Future[Mensagem]) -> None:
+        self.vagas.release()
+        try:
+            resposta = futuro.result()
+        except Exception as erro:  # noqa: BLE001
+            # O processo morreu ou o pedido não pôde ser enviado
+            resposta = {'id': pedido.get('id'), 'erro': str(erro) or type(erro).__name__}
+        responde(resposta)
+
+    def encerra(self) -> None:
+        for executor in self.executores:
+            executor.shutdown(cancel_futures=True)
+
+
+def escritor(saida: IO[str]) -> 'Callable[[Mensagem], None]':
+    # As respostas chegam de várias threads e podem sair fora de ordem; o id diz a qual pedido respondem
+    trava = Lock()
+
+    def responde(resposta: Mensagem) -> None:
+        with trava:
+            saida.write(json.dumps(resposta, ensure_ascii=False) + '\n')
+            saida.flush()
+
+    return responde
+
+
+def atende_fluxo(servidor: Servidor, linhas: 'Iterable[str]', responde: 'Callable[[Mensagem], None]') -> None:
+    pendentes: list[Future[Mensagem]] = []
+    for linha in linhas:
+        if not linha.strip():
+            continue
+        futuro = servidor.atende(linha, responde)
+        if futuro is not None:
+            pendentes = [pendente for pendente in pendentes if not pendente.done()]
+            pendentes.append(futuro)
+    # Só fecha a conexão depois de responder tudo
+    wait(pendentes)
+
+
+class Conexao(socketserver.StreamRequestHandler):
+    def __init__(self, servidor: Servidor, *argumentos: Any) -> None:  # noqa: ANN401
+        self.servidor = servidor
+        super().__init__(*argumentos)
+
+    def handle(self) -> None:
+        linhas = (linha.decode('utf-8') for linha in self.rfile)
+        with self.connection.makefile('w', encoding='utf-8') as saida:
+            atende_fluxo(self.servidor, linhas, escritor(saida))
+
+
+class ServidorTCP(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class ServidorUnix(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def argumentos_linha_de_comando() -> Namespace:
+    parser = ArgumentParser(
+        description='Servidor de análise: recebe pedidos em JSON, um por linha, e responde com a melhor jogada.'
+    )
+    parser.add_argument('--porta', type=int, help='escuta em 127.0.0.1 nessa porta em vez da entrada padrão')
+    parser.add_argument('--socket', help='escuta nesse socket unix em vez da entrada padrão')
+    parser.add_argument('--processos', type=int, default=1)
+    parser.add_argument('--fila', type=int, help='pedidos pendentes ao mesmo tempo; o padrão é 2 por processo')
+    parser.add_argument('--partidas', type=int, default=PARTIDAS_EM_CACHE, help='partidas guardadas por processo')
+    parser.add_argument('--c', type=float, default=0.1, help='constante de exploração quando o pedido não manda')
+    return parser.parse_args()
+
+
+def main() -> None:
+    argumentos = argumentos_linha_de_comando()
+    fila = argumentos.fila if argumentos.fila is not None else 2 * argumentos.processos
+    servidor = Servidor(argumentos.processos, fila, argumentos.partidas, argumentos.c)
+    conexao = partial(Conexao, servidor)
+
+    try:
+        if argumentos.porta is not None:
+            with ServidorTCP(('127.0.0.1', argumentos.porta), conexao) as tcp:
+                tcp.serve_forever()
+        elif argumentos.socket is not None:
+            with ServidorUnix(argumentos.socket, conexao) as unix:
+                unix.serve_forever()
+        else:
+            atende_fluxo(servidor, sys.stdin, escritor(sys.stdout))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.encerra()
+
+
+if __name__ == '__main__':
+    main()
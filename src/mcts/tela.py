@@ -1,18 +1,109 @@
-from queue import Queue
 from typing import TYPE_CHECKING, ClassVar
 
-from textual import on
+from rich.text import Text
+from textual import on, work
 from textual.app import App, ComposeResult
 from textual.containers import Horizontal, Vertical
 from textual.coordinate import Coordinate
 from textual.widgets import DataTable, Footer, Header, Label, Tree
+from textual.worker import get_current_worker
 
+from mcts.arvore import IACompacta
+from mcts.bitboard import JogoDaVelhaBitboard, Lig4Bitboard
 from mcts.ia import IA, No
-from mcts.jogo import JogadaJogoDaVelha, JogadaLig4, JogoDaVelha, Lig4
+from mcts.jogo import JogadaJogoDaVelha, JogadaLig4, Jogo, JogoDaVelha, Lig4
+from mcts.livro import LivroAberturas
+from mcts.politica import POLITICAS
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from rich.style import Style
     from textual.widgets._tree import TreeNode
 
+JOGADAS_NO_PROGRESSO = 5
+FILHOS_POR_PAGINA = 10
+
+
+class ItemArvore[Jogada]:
+    # Dado de cada linha do widget da árvore. Os filhos do nó só são lidos quando a linha é aberta;
+    # sem nó, a linha é a entrada "mais…" que mostra a próxima página de filhos do pai
+    def __init__(self, no: No[Jogada] | None, jogada: Jogada | None = None) -> None:
+        self.no = no
+        self.jogada = jogada
+        self.filhos: list[tuple[Jogada, No[Jogada]]] | None = None
+        self.mostrados = 0
+
+
+class ArvoreBusca[Jogada](Tree[ItemArvore[Jogada]]):
+    # Cria as linhas sob demanda: os filhos de um nó entram só quando ele é aberto, ordenados por visitas e
+    # FILHOS_POR_PAGINA por vez, e o texto de cada linha só é montado quando ela é desenhada
+    def __init__(self, c: float, formata: 'Callable[[Jogada], str]', id: str) -> None:  # noqa: A002
+        super().__init__('*', id=id)
+        self.c = c
+        self.formata = formata
+
+    def mostra(self, arvore: No[Jogada] | None) -> None:
+        if arvore is None:
+            self.reset('*')
+            return
+
+        self.reset('*', ItemArvore(arvore))
+        self.carrega(self.root)
+        self.root.expand()
+
+    def carrega(self, linha: 'TreeNode[ItemArvore[Jogada]]') -> None:
+        item = linha.data
+        if item is None or item.no is None or item.filhos is not None:
+            return
+
+        item.filhos = sorted(item.no.filhos.items(), key=lambda par: par[1].visitas, reverse=True)
+        self.mostra_pagina(linha)
+
+    def mostra_pagina(self, linha: 'TreeNode[ItemArvore[Jogada]]') -> None:
+        item = linha.data
+        if item is None or item.filhos is None:
+            return
+
+        pagina = item.filhos[item.mostrados : item.mostrados + FILHOS_POR_PAGINA]
+        for jogada, filho in pagina:
+            linha.add('', data=ItemArvore(filho, jogada), allow_expand=bool(filho.filhos))
+        item.mostrados += len(pagina)
+
+        restantes = len(item.filhos) - item.mostrados
+        if restantes:
+            linha.add_leaf(f'mais… ({restantes})', data=ItemArvore[Jogada](None))
+
+    @on(Tree.NodeExpanded)
+    def expande(self, event: Tree.NodeExpanded[ItemArvore[Jogada]]) -> None:
+        self.carrega(event.node)
+
+    @on(Tree.NodeSelected)
+    def seleciona(self, event: Tree.NodeSelected[ItemArvore[Jogada]]) -> None:
+        linha = event.node
+        if linha.data is None or linha.data.no is not None or linha.parent is None:
+            return
+
+        pai = linha.parent
+        linha.remove()
+        self.mostra_pagina(pai)
+
+    def render_label(self, node: 'TreeNode[ItemArvore[Jogada]]', base_style: 'Style', style: 'Style') -> Text:
+        texto = super().render_label(node, base_style, style)
+        item = node.data
+        if item is not None and item.no is not None and item.jogada is not None:
+            # O pai vem da linha de cima: com a tabela de transposição os nós não guardam o pai
+            pai = node.parent.data if node.parent is not None else None
+            visitas_pai = pai.no.visitas if pai is not None and pai.no is not None else 0
+            texto.append(self.rotulo(item.no, item.jogada, visitas_pai), style)
+        return texto
+
+    def rotulo(self, no: No[Jogada], jogada: Jogada, visitas_pai: int) -> str:
+        return (
+            f'{self.formata(jogada)} {no.visitas} {no.pontuacao:.6f} '
+            f'[{no.pontuacao:.6f} + {self.c} * sqrt({visitas_pai} / {no.visitas})]'
+        )
+
 
 class Tela(App[None]):
     CSS_PATH = './styles/tela.tcss'
@@ -22,43 +113,131 @@ class Tela(App[None]):
         ('t', 'swap_players', 'Troca jogadores'),
         ('f', 'easier', 'Mais fácil'),
         ('d', 'harder', 'Mais difícil'),
+        ('s', 'stop', 'Parar busca'),
+        ('c', 'cancel', 'Cancelar jogada'),
     ]
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         c: float,
         max_iteracoes: int,
         jogador_vai_primeiro: bool,
         tamanho: int,
         pontos_pra_ganhar: int,
+        bitboard: bool = False,
+        vizinhanca: int | None = None,
+        processos: int = 1,
+        threads: int = 1,
+        compartilhada: bool = False,
+        tempo_limite: int | None = None,
+        ponderar: bool = False,
+        arvore_compacta: bool = False,
+        transposicoes: int | None = None,
+        coleta_estatisticas: bool = False,
+        livro: str | None = None,
+        rave: float | None = None,
+        resolvedor: bool = False,
+        parada_visitas: float | None = None,
+        parada_confianca: float | None = None,
+        max_nos: int | None = None,
+        poda: bool = True,
+        politica: str | None = None,
+        simetria: int | None = None,
     ) -> None:
         self.c = c
         self.max_iteracoes = max_iteracoes
+        self.processos = processos
+        self.threads = threads
+        self.compartilhada = compartilhada
+        self.tempo_limite = tempo_limite
+        self.ponderar = ponderar
+        self.arvore_compacta = arvore_compacta
+        self.transposicoes = transposicoes
+        self.coleta_estatisticas = coleta_estatisticas
+        self.livro = LivroAberturas(livro) if livro is not None else None
+        self.rave = rave
+        self.resolvedor = resolvedor
+        self.parada_visitas = parada_visitas
+        self.parada_confianca = parada_confianca
+        self.max_nos = max_nos
+        self.poda = poda
+        self.politica = POLITICAS[politica] if politica is not None else None
+        self.simetria = simetria
         self.jogador = jogador_vai_primeiro
         self.tamanho = tamanho
         self.pontos_pra_ganhar = pontos_pra_ganhar
-        self.jogo = JogoDaVelha(tamanho, pontos_pra_ganhar)
+        self.vizinhanca = vizinhanca
+        self.bitboard = bitboard
+        self.jogo = self.novo_jogo()
+        self.ia = self.nova_ia()
+        self.ultima_jogada: JogadaJogoDaVelha | None = None
 
         self.pausado = False
+        self.buscando = False
+        self.cancelado = False
         self.simbolos = {None: ' ', False: 'O', True: 'X'}
 
         self.elemento_ia_info = Label(id='ia-info')
-        self.elemento_ia_tree = Tree[None]('*', id='ia-tree')
+        self.elemento_ia_tree = ArvoreBusca[JogadaJogoDaVelha](
+            c, lambda jogada: f'({jogada[0]}, {jogada[1]})', id='ia-tree'
+        )
         self.elemento_game_table = DataTable[str](id='game-table')
         self.elemento_game_result = Label(id='game-result')
 
         super().__init__()
 
+    def nova_ia(self) -> IA[JogadaJogoDaVelha]:
+        # A árvore compacta recusa as opções que não implementa, em vez de ignorá-las
+        classe = IACompacta[JogadaJogoDaVelha] if self.arvore_compacta else IA[JogadaJogoDaVelha]
+        return classe(
+            self.c,
+            self.max_iteracoes,
+            processos=self.processos,
+            threads=self.threads,
+            compartilhada=self.compartilhada,
+            tempo_limite=self.tempo_limite,
+            transposicoes=self.transposicoes,
+            coleta_estatisticas=self.coleta_estatisticas,
+            livro=self.livro,
+            rave=self.rave,
+            resolvedor=self.resolvedor,
+            parada_visitas=self.parada_visitas,
+            parada_confianca=self.parada_confianca,
+            max_nos=self.max_nos,
+            poda=self.poda,
+            politica=self.politica,
+            simetria=self.simetria,
+        )
+
+    def novo_jogo(self) -> JogoDaVelha | JogoDaVelhaBitboard:
+        if self.bitboard:
+            return JogoDaVelhaBitboard(self.tamanho, self.pontos_pra_ganhar, self.vizinhanca)
+        return JogoDaVelha(self.tamanho, self.pontos_pra_ganhar, self.vizinhanca)
+
     def check_action(self, action: str, parameters: tuple[object, ...]) -> bool | None:  # noqa: ARG002
         if action == 'exit':
             return True
         if action in ('restart', 'swap_players', 'easier', 'harder'):
             return not self.pausado
+        # Na busca em paralelo na raiz cada processo busca até o fim numa árvore própria, sem ver o parar
+        interrompivel = self.buscando and (self.processos == 1 or self.compartilhada)
+        if action == 'stop':
+            return interrompivel
+        if action == 'cancel':
+            return interrompivel and self.ultima_jogada is not None
         return True
 
     def action_exit(self) -> None:
+        self.ia.encerra()
         self.exit(None)
 
+    def action_stop(self) -> None:
+        self.ia.parar.set()
+
+    def action_cancel(self) -> None:
+        self.cancelado = True
+        self.ia.parar.set()
+
     async def action_restart(self) -> None:
         await self.set_start()
 
@@ -67,12 +246,28 @@ class Tela(App[None]):
         await self.set_start()
 
     def action_easier(self) -> None:
-        self.max_iteracoes = max(1, self.max_iteracoes // 2)
-        self.elemento_ia_info.update(f'Iteracoes por jogada: {self.max_iteracoes}')
+        if self.tempo_limite is None:
+            self.max_iteracoes = max(1, self.max_iteracoes // 2)
+        else:
+            self.tempo_limite = max(1, self.tempo_limite // 2)
+        self.elemento_ia_info.update(self.dificuldade())
 
     def action_harder(self) -> None:
-        self.max_iteracoes *= 2
-        self.elemento_ia_info.update(f'Iteracoes por jogada: {self.max_iteracoes}')
+        if self.tempo_limite is None:
+            self.max_iteracoes *= 2
+        else:
+            self.tempo_limite *= 2
+        self.elemento_ia_info.update(self.dificuldade())
+
+    def dificuldade(self) -> str:
+        if self.tempo_limite is None:
+            return f'Iteracoes por jogada: {self.max_iteracoes}'
+        return f'Tempo por jogada: {self.tempo_limite} ms'
+
+    def info_busca(self) -> str:
+        if self.cancelado or self.ia.estatisticas is None:
+            return self.dificuldade()
+        return f'{self.dificuldade()}\n{self.ia.estatisticas.resumo()}'
 
     def compose(self) -> ComposeResult:
         yield Header()
@@ -96,13 +291,17 @@ class Tela(App[None]):
         self.pausado = True
         self.refresh_bindings()
 
-        self.jogo = JogoDaVelha(self.tamanho, self.pontos_pra_ganhar)
+        self.jogo = self.novo_jogo()
+        self.ia.encerra()
+        self.ia = self.nova_ia()
+        self.ultima_jogada = None
         self.set_tree(None)
         await self.set_table()
         self.elemento_game_result.update('')
-        self.elemento_ia_info.update(f'Iteracoes por jogada: {self.max_iteracoes}')
+        self.elemento_ia_info.update(self.dificuldade())
         if not self.jogador:
             self.ia_play()
+            return
 
         self.pausado = False
         self.refresh_bindings()
@@ -136,6 +335,8 @@ class Tela(App[None]):
 
         try:
             self.jogo.joga(jogada)
+            self.ia.avanca(jogada)
+            self.ultima_jogada = jogada
             self.elemento_game_table.update_cell_at(Coordinate(jogada[0], jogada[1]), self.simbolos[self.jogador])
         except:
             self.pausado = False
@@ -151,9 +352,65 @@ class Tela(App[None]):
 
         self.ia_play()
 
-        if self.jogo.acabou():
-            self.set_ending()
-            return
+    def ia_play(self) -> None:
+        self.buscando = True
+        self.cancelado = False
+        self.refresh_bindings()
+
+        self.ia.max_iteracoes = self.max_iteracoes
+        self.ia.tempo_limite = self.tempo_limite
+        self.ia.ao_progredir = self.ia_progress
+        # Limpo aqui, antes da thread começar, um s ou c apertado logo em seguida já vale para esta busca
+        self.ia.parar.clear()
+        self.ia_search(self.ia, self.jogo)
+
+    @work(thread=True, exclusive=True, group='ia')
+    def ia_search(self, ia: IA[JogadaJogoDaVelha], jogo: Jogo[JogadaJogoDaVelha]) -> None:
+        jogada = ia.escolhe_jogada(jogo)
+        if not get_current_worker().is_cancelled:
+            self.call_from_thread(self.ia_done, jogada)
+
+    def ia_progress(self) -> None:
+        # Chamado pela thread da busca, que fica parada até o retrato da árvore ser montado
+        filhos = sorted(self.ia.arvore.filhos.items(), key=lambda item: item[1].visitas, reverse=True)
+        linhas = [
+            f'({jogada[0]}, {jogada[1]}) {filho.visitas} {filho.pontuacao:.6f}'
+            for jogada, filho in filhos[:JOGADAS_NO_PROGRESSO]
+        ]
+        info = f'Buscando... visitas na raiz: {self.ia.arvore.visitas}\nMelhor jogada: {self.ia.melhor_jogada()}'
+        self.call_from_thread(self.set_progress, info, linhas)
+
+    def set_progress(self, info: str, linhas: list[str]) -> None:
+        self.elemento_ia_info.update(info)
+        self.elemento_ia_tree.reset('*')
+        for linha in linhas:
+            self.elemento_ia_tree.root.add_leaf(linha)
+        self.elemento_ia_tree.root.expand()
+
+    def ia_done(self, jogada: JogadaJogoDaVelha) -> None:
+        self.buscando = False
+        self.ia.ao_progredir = None
+        self.elemento_ia_info.update(self.info_busca())
+
+        if self.cancelado and self.ultima_jogada is not None:
+            self.jogo.desfaz(self.ultima_jogada)
+            self.ia.reinicia()
+            self.set_tree(None)
+            x, y = self.ultima_jogada
+            self.elemento_game_table.update_cell_at(Coordinate(x, y), self.simbolos[None])
+            self.ultima_jogada = None
+        else:
+            self.jogo.joga(jogada)
+            self.set_tree(self.ia.arvore)
+            self.ia.avanca(jogada)
+            if self.ponderar and not self.jogo.acabou():
+                self.ia.inicia_ponderacao(self.jogo)
+
+            self.elemento_game_table.update_cell_at(Coordinate(jogada[0], jogada[1]), self.simbolos[not self.jogador])
+
+            if self.jogo.acabou():
+                self.set_ending()
+                return
 
         self.pausado = False
         self.refresh_bindings()
@@ -161,35 +418,8 @@ class Tela(App[None]):
         self.elemento_game_table.focus()
         self.elemento_game_table.disabled = False
 
-    def ia_play(self) -> None:
-        ia = IA[JogadaJogoDaVelha](self.c, self.max_iteracoes)
-        jogada = ia.escolhe_jogada(self.jogo)
-        self.jogo.joga(jogada)
-        self.set_tree(ia.arvore)
-
-        self.elemento_game_table.update_cell_at(Coordinate(jogada[0], jogada[1]), self.simbolos[not self.jogador])
-
     def set_tree(self, arvore: No[JogadaJogoDaVelha] | None) -> None:
-        self.elemento_ia_tree.clear()
-
-        if arvore:
-            fila: Queue[tuple[TreeNode[None], No[JogadaJogoDaVelha]]] = Queue()
-            fila.put((self.elemento_ia_tree.root, arvore))
-
-            while not fila.empty():
-                element, no_atual = fila.get()
-
-                for jogada in sorted(no_atual.filhos):
-                    filho = no_atual.filhos[jogada]
-                    visitas_pai = filho.pai.visitas if filho.pai else 0
-                    child_element = element.add(
-                        f'({jogada[0]}, {jogada[1]}) {filho.visitas} {filho.pontuacao:.6f} [{filho.pontuacao:.6f} + {self.c} * sqrt({visitas_pai} / {filho.visitas})]',
-                        expand=False,
-                    )
-
-                    fila.put((child_element, filho))
-
-            self.elemento_ia_tree.root.expand()
+        self.elemento_ia_tree.mostra(arvore)
 
     def set_ending(self) -> None:
         self.pausado = False
@@ -211,6 +441,8 @@ class TelaLig4(App[None]):
         ('t', 'swap_players', 'Troca jogadores'),
         ('f', 'easier', 'Mais fácil'),
         ('d', 'harder', 'Mais difícil'),
+        ('s', 'stop', 'Parar busca'),
+        ('c', 'cancel', 'Cancelar jogada'),
     ]
 
     def __init__(  # noqa: PLR0913
@@ -221,35 +453,120 @@ class TelaLig4(App[None]):
         colunas: int,
         linhas: int,
         casas_para_ganhar: int,
+        bitboard: bool = False,
+        processos: int = 1,
+        threads: int = 1,
+        compartilhada: bool = False,
+        tempo_limite: int | None = None,
+        ponderar: bool = False,
+        arvore_compacta: bool = False,
+        transposicoes: int | None = None,
+        coleta_estatisticas: bool = False,
+        livro: str | None = None,
+        rave: float | None = None,
+        resolvedor: bool = False,
+        parada_visitas: float | None = None,
+        parada_confianca: float | None = None,
+        max_nos: int | None = None,
+        poda: bool = True,
+        politica: str | None = None,
+        simetria: int | None = None,
+        lote: int = 1,
     ) -> None:
         self.c = c
         self.max_iteracoes = max_iteracoes
+        self.processos = processos
+        self.threads = threads
+        self.compartilhada = compartilhada
+        self.tempo_limite = tempo_limite
+        self.ponderar = ponderar
+        self.arvore_compacta = arvore_compacta
+        self.transposicoes = transposicoes
+        self.coleta_estatisticas = coleta_estatisticas
+        self.livro = LivroAberturas(livro) if livro is not None else None
+        self.rave = rave
+        self.resolvedor = resolvedor
+        self.parada_visitas = parada_visitas
+        self.parada_confianca = parada_confianca
+        self.max_nos = max_nos
+        self.poda = poda
+        self.politica = POLITICAS[politica] if politica is not None else None
+        self.simetria = simetria
+        self.lote = lote
         self.jogador = jogador_vai_primeiro
         self.colunas = colunas
         self.linhas = linhas
         self.casas_para_ganhar = casas_para_ganhar
-        self.jogo = Lig4(colunas, linhas, casas_para_ganhar)
+        self.bitboard = bitboard
+        self.jogo = self.novo_jogo()
+        self.ia = self.nova_ia()
+        self.ultima_jogada: JogadaLig4 | None = None
 
         self.pausado = False
+        self.buscando = False
+        self.cancelado = False
         self.simbolos = {None: ' ', False: 'O', True: 'X'}
 
         self.elemento_ia_info = Label(id='ia-info')
-        self.elemento_ia_tree = Tree[None]('*', id='ia-tree')
+        self.elemento_ia_tree = ArvoreBusca[JogadaLig4](c, lambda jogada: f'{jogada})', id='ia-tree')
         self.elemento_game_table = DataTable[str](id='game-table')
         self.elemento_game_result = Label(id='game-result')
 
         super().__init__()
 
+    def nova_ia(self) -> IA[JogadaLig4]:
+        # A árvore compacta recusa as opções que não implementa, em vez de ignorá-las
+        classe = IACompacta[JogadaLig4] if self.arvore_compacta else IA[JogadaLig4]
+        return classe(
+            self.c,
+            self.max_iteracoes,
+            processos=self.processos,
+            threads=self.threads,
+            compartilhada=self.compartilhada,
+            tempo_limite=self.tempo_limite,
+            transposicoes=self.transposicoes,
+            coleta_estatisticas=self.coleta_estatisticas,
+            livro=self.livro,
+            rave=self.rave,
+            resolvedor=self.resolvedor,
+            parada_visitas=self.parada_visitas,
+            parada_confianca=self.parada_confianca,
+            max_nos=self.max_nos,
+            poda=self.poda,
+            politica=self.politica,
+            simetria=self.simetria,
+            lote=self.lote,
+        )
+
+    def novo_jogo(self) -> Lig4 | Lig4Bitboard:
+        if self.bitboard:
+            return Lig4Bitboard(self.colunas, self.linhas, self.casas_para_ganhar)
+        return Lig4(self.colunas, self.linhas, self.casas_para_ganhar)
+
     def check_action(self, action: str, parameters: tuple[object, ...]) -> bool | None:  # noqa: ARG002
         if action == 'exit':
             return True
         if action in ('restart', 'swap_players', 'easier', 'harder'):
             return not self.pausado
+        # Na busca em paralelo na raiz cada processo busca até o fim numa árvore própria, sem ver o parar
+        interrompivel = self.buscando and (self.processos == 1 or self.compartilhada)
+        if action == 'stop':
+            return interrompivel
+        if action == 'cancel':
+            return interrompivel and self.ultima_jogada is not None
         return True
 
     def action_exit(self) -> None:
+        self.ia.encerra()
         self.exit(None)
 
+    def action_stop(self) -> None:
+        self.ia.parar.set()
+
+    def action_cancel(self) -> None:
+        self.cancelado = True
+        self.ia.parar.set()
+
     async def action_restart(self) -> None:
         await self.set_start()
 
@@ -258,12 +575,28 @@ class TelaLig4(App[None]):
         await self.set_start()
 
     def action_easier(self) -> None:
-        self.max_iteracoes = max(1, self.max_iteracoes // 2)
-        self.elemento_ia_info.update(f'Iteracoes por jogada: {self.max_iteracoes}')
+        if self.tempo_limite is None:
+            self.max_iteracoes = max(1, self.max_iteracoes // 2)
+        else:
+            self.tempo_limite = max(1, self.tempo_limite // 2)
+        self.elemento_ia_info.update(self.dificuldade())
 
     def action_harder(self) -> None:
-        self.max_iteracoes *= 2
-        self.elemento_ia_info.update(f'Iteracoes por jogada: {self.max_iteracoes}')
+        if self.tempo_limite is None:
+            self.max_iteracoes *= 2
+        else:
+            self.tempo_limite *= 2
+        self.elemento_ia_info.update(self.dificuldade())
+
+    def dificuldade(self) -> str:
+        if self.tempo_limite is None:
+            return f'Iteracoes por jogada: {self.max_iteracoes}'
+        return f'Tempo por jogada: {self.tempo_limite} ms'
+
+    def info_busca(self) -> str:
+        if self.cancelado or self.ia.estatisticas is None:
+            return self.dificuldade()
+        return f'{self.dificuldade()}\n{self.ia.estatisticas.resumo()}'
 
     def compose(self) -> ComposeResult:
         yield Header()
@@ -287,13 +620,17 @@ class TelaLig4(App[None]):
         self.pausado = True
         self.refresh_bindings()
 
-        self.jogo = Lig4(self.colunas, self.linhas, self.casas_para_ganhar)
+        self.jogo = self.novo_jogo()
+        self.ia.encerra()
+        self.ia = self.nova_ia()
+        self.ultima_jogada = None
         self.set_tree(None)
         await self.set_table()
         self.elemento_game_result.update('')
-        self.elemento_ia_info.update(f'Iteracoes por jogada: {self.max_iteracoes}')
+        self.elemento_ia_info.update(self.dificuldade())
         if not self.jogador:
             self.ia_play()
+            return
 
         self.pausado = False
         self.refresh_bindings()
@@ -330,6 +667,8 @@ class TelaLig4(App[None]):
 
         try:
             self.jogo.joga(jogada)
+            self.ia.avanca(jogada)
+            self.ultima_jogada = jogada
             self._update_column(jogada)
         except:
             self.pausado = False
@@ -345,9 +684,63 @@ class TelaLig4(App[None]):
 
         self.ia_play()
 
-        if self.jogo.acabou():
-            self.set_ending()
-            return
+    def ia_play(self) -> None:
+        self.buscando = True
+        self.cancelado = False
+        self.refresh_bindings()
+
+        self.ia.max_iteracoes = self.max_iteracoes
+        self.ia.tempo_limite = self.tempo_limite
+        self.ia.ao_progredir = self.ia_progress
+        # Limpo aqui, antes da thread começar, um s ou c apertado logo em seguida já vale para esta busca
+        self.ia.parar.clear()
+        self.ia_search(self.ia, self.jogo)
+
+    @work(thread=True, exclusive=True, group='ia')
+    def ia_search(self, ia: IA[JogadaLig4], jogo: Jogo[JogadaLig4]) -> None:
+        jogada = ia.escolhe_jogada(jogo)
+        if not get_current_worker().is_cancelled:
+            self.call_from_thread(self.ia_done, jogada)
+
+    def ia_progress(self) -> None:
+        # Chamado pela thread da busca, que fica parada até o retrato da árvore ser montado
+        filhos = sorted(self.ia.arvore.filhos.items(), key=lambda item: item[1].visitas, reverse=True)
+        linhas = [
+            f'{jogada}) {filho.visitas} {filho.pontuacao:.6f}' for jogada, filho in filhos[:JOGADAS_NO_PROGRESSO]
+        ]
+        info = f'Buscando... visitas na raiz: {self.ia.arvore.visitas}\nMelhor jogada: {self.ia.melhor_jogada()}'
+        self.call_from_thread(self.set_progress, info, linhas)
+
+    def set_progress(self, info: str, linhas: list[str]) -> None:
+        self.elemento_ia_info.update(info)
+        self.elemento_ia_tree.reset('*')
+        for linha in linhas:
+            self.elemento_ia_tree.root.add_leaf(linha)
+        self.elemento_ia_tree.root.expand()
+
+    def ia_done(self, jogada: JogadaLig4) -> None:
+        self.buscando = False
+        self.ia.ao_progredir = None
+        self.elemento_ia_info.update(self.info_busca())
+
+        if self.cancelado and self.ultima_jogada is not None:
+            self.jogo.desfaz(self.ultima_jogada)
+            self.ia.reinicia()
+            self.set_tree(None)
+            self._update_column(self.ultima_jogada)
+            self.ultima_jogada = None
+        else:
+            self.jogo.joga(jogada)
+            self.set_tree(self.ia.arvore)
+            self.ia.avanca(jogada)
+            if self.ponderar and not self.jogo.acabou():
+                self.ia.inicia_ponderacao(self.jogo)
+
+            self._update_column(jogada)
+
+            if self.jogo.acabou():
+                self.set_ending()
+                return
 
         self.pausado = False
         self.refresh_bindings()
@@ -355,35 +748,8 @@ class TelaLig4(App[None]):
         self.elemento_game_table.focus()
         self.elemento_game_table.disabled = False
 
-    def ia_play(self) -> None:
-        ia = IA[JogadaLig4](self.c, self.max_iteracoes)
-        jogada = ia.escolhe_jogada(self.jogo)
-        self.jogo.joga(jogada)
-        self.set_tree(ia.arvore)
-
-        self._update_column(jogada)
-
     def set_tree(self, arvore: No[JogadaLig4] | None) -> None:
-        self.elemento_ia_tree.clear()
-
-        if arvore:
-            fila: Queue[tuple[TreeNode[None], No[JogadaLig4]]] = Queue()
-            fila.put((self.elemento_ia_tree.root, arvore))
-
-            while not fila.empty():
-                element, no_atual = fila.get()
-
-                for jogada in sorted(no_atual.filhos):
-                    filho = no_atual.filhos[jogada]
-                    visitas_pai = filho.pai.visitas if filho.pai else 0
-                    child_element = element.add(
-                        f'{jogada}) {filho.visitas} {filho.pontuacao:.6f} [{filho.pontuacao:.6f} + {self.c} * sqrt({visitas_pai} / {filho.visitas})]',
-                        expand=False,
-                    )
-
-                    fila.put((child_element, filho))
-
-            self.elemento_ia_tree.root.expand()
+        self.elemento_ia_tree.mostra(arvore)
 
     def set_ending(self) -> None:
         self.pausado = False
@@ -0,0 +1,39 @@
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from mcts.ia import No
+
+
+class TabelaTransposicao[Jogada]:
+    # Liga a chave de uma posição ao nó que guarda suas estatísticas, para que ordens diferentes de
+    # jogadas que chegam na mesma posição dividam o mesmo nó. Quando enche, esquece a posição usada
+    # há mais tempo; o nó continua na árvore, só deixa de ser compartilhado
+    def __init__(self, tamanho_maximo: int) -> None:
+        if tamanho_maximo <= 0:
+            raise ValueError('Tamanho da tabela de transposição inválido')
+
+        self.tamanho_maximo = tamanho_maximo
+        self.nos: OrderedDict[int, No[Jogada]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.nos)
+
+    def busca(self, chave: int) -> 'No[Jogada] | None':
+        no = self.nos.get(chave)
+        if no is not None:
+            self.nos.move_to_end(chave)
+        return no
+
+    def guarda(self, chave: int, no: 'No[Jogada]') -> None:
+        self.nos[chave] = no
+        self.nos.move_to_end(chave)
+        if len(self.nos) > self.tamanho_maximo:
+            self.nos.popitem(last=False)
+
+    def mantem(self, ids: set[int]) -> None:
+        # Fica só com os nós desses ids, na mesma ordem de uso
+        self.nos = OrderedDict((chave, no) for chave, no in self.nos.items() if id(no) in ids)
+
+    def limpa(self) -> None:
+        self.nos.clear()